@@ -1,2 +1,4 @@
 # -*- coding: utf-8 -*-
 __version__ = '0.9.1'
+
+default_app_config = 'multilingual_tags.apps.MultilingualTagsConfig'
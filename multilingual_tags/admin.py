@@ -1,37 +1,222 @@
 """Admin classes for the multilingual_tags app."""
 from django import forms
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
 from django.contrib.contenttypes.admin import (
     BaseGenericInlineFormSet,
     GenericTabularInline,
 )
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+from django.urls import NoReverseMatch, reverse
+from django.utils.functional import cached_property
+from django.utils.text import Truncator
 from django.utils.translation import ugettext_lazy as _
 
 from parler.admin import TranslatableAdmin
 
-from . import models
+from . import app_settings, models
+
+
+class BulkRawIdWidget(ForeignKeyRawIdWidget):
+    """
+    Raw id widget, that takes its label from the ``objects`` mapping.
+
+    ``objects`` maps the primary keys as strings to the related objects and
+    is set by the formset, so that the labels of all rows are resolved with
+    one query.
+
+    """
+    objects = None
+
+    def label_and_url_for_value(self, value):
+        obj = (self.objects or {}).get(str(value))
+        if obj is None:
+            return super(BulkRawIdWidget, self).label_and_url_for_value(value)
+        try:
+            url = reverse('{0}:{1}_{2}_change'.format(
+                self.admin_site.name, obj._meta.app_label,
+                obj._meta.model_name), args=[obj.pk])
+        except NoReverseMatch:
+            url = ''
+        return Truncator(obj).words(14), url
+
+
+class BulkModelChoiceField(forms.ModelChoiceField):
+    """Choice field, that looks up the objects in ``objects`` first."""
+    objects = None
+
+    def to_python(self, value):
+        if value not in self.empty_values:
+            obj = (self.objects or {}).get(str(value))
+            if obj is not None:
+                return obj
+        return super(BulkModelChoiceField, self).to_python(value)
+
+
+class TaggedItemInlineForm(forms.ModelForm):
+    def _get_validation_exclusions(self):
+        exclude = super(
+            TaggedItemInlineForm, self)._get_validation_exclusions()
+        # the choice fields already made sure, that the related objects exist,
+        # the formset checks the uniqueness of the tags for all rows at once
+        return exclude + [
+            name for name, field in self.fields.items()
+            if isinstance(field, BulkModelChoiceField)]
 
 
 class TaggedItemInlineFormSet(BaseGenericInlineFormSet):
     model = models.TaggedItem
+    #: The foreign keys, whose objects are fetched for all rows at once.
+    bulk_fields = ('tag', 'user')
+
+    def __init__(self, *args, **kwargs):
+        super(TaggedItemInlineFormSet, self).__init__(*args, **kwargs)
+        self.queryset = self.queryset.with_objects()
+
+    def get_related_queryset(self, field):
+        if field.name == 'tag':
+            return models.Tag.objects.with_names()
+        return field.related_model._default_manager.all()
+
+    @cached_property
+    def related_objects(self):
+        """The related objects of all rows with one query per field."""
+        result = {}
+        for name in self.bulk_fields:
+            field = self.model._meta.get_field(name)
+            values = set(getattr(item, field.attname)
+                         for item in self.get_queryset())
+            if self.is_bound:
+                values.update(
+                    self.data.get('{0}-{1}'.format(self.add_prefix(i), name))
+                    for i in range(0, self.total_form_count()))
+            pks = set()
+            for value in values:
+                try:
+                    pks.add(field.target_field.to_python(value))
+                except ValidationError:
+                    continue
+            pks.discard(None)
+            result[name] = {}
+            if pks:
+                result[name] = {
+                    str(obj.pk): obj for obj in
+                    self.get_related_queryset(field).filter(pk__in=pks)}
+        return result
+
+    @cached_property
+    def existing_objects(self):
+        return {str(item.pk): item for item in self.get_queryset()}
+
+    def add_fields(self, form, index):
+        super(TaggedItemInlineFormSet, self).add_fields(form, index)
+        # resolves the hidden primary keys without a query per row
+        pk_name = self.model._meta.pk.name
+        field = form.fields[pk_name]
+        form.fields[pk_name] = BulkModelChoiceField(
+            field.queryset, initial=field.initial, required=False,
+            widget=field.widget)
+        form.fields[pk_name].objects = self.existing_objects
+
+    def _construct_form(self, i, **kwargs):
+        form = super(TaggedItemInlineFormSet, self)._construct_form(
+            i, **kwargs)
+        for name in self.bulk_fields:
+            field = form.fields.get(name)
+            if isinstance(field, BulkModelChoiceField):
+                field.objects = self.related_objects[name]
+                field.widget.objects = self.related_objects[name]
+        return form
 
     def clean(self):
         cleaned_data = super(TaggedItemInlineFormSet, self).clean()
         # validate, that every tag is only used once
-        tags = []
-        for i in range(0, self.total_form_count()):
-            tags.append(self.data.get('{0}-{1}-tag'.format(self.prefix, i)))
-        if len(tags) != len(set(tags)):
-            raise forms.ValidationError(_(
-                'A Tag may only exist once per object.'))
+        tag_ids = set()
+        for form in self.forms:
+            if not form.is_valid() or self._should_delete_form(form):
+                continue
+            tag = form.cleaned_data.get('tag')
+            if tag is None:
+                continue
+            if tag.pk in tag_ids:
+                raise forms.ValidationError(_(
+                    'A Tag may only exist once per object.'))
+            tag_ids.add(tag.pk)
+        if tag_ids and self.instance.pk is not None:
+            # the forms skip the unique check per row, so rows added since
+            # the page was rendered are looked up once for all tags
+            items = models.TaggedItem.objects.filter(
+                content_type=ContentType.objects.get_for_model(
+                    self.instance,
+                    for_concrete_model=self.for_concrete_model),
+                object_id=self.instance.pk,
+                tag_id__in=tag_ids,
+            )
+            initial_ids = [form.instance.pk for form in self.initial_forms]
+            if items.exclude(pk__in=initial_ids).exists():
+                raise forms.ValidationError(_(
+                    'A Tag may only exist once per object.'))
         return cleaned_data
 
 
 class TaggedItemInline(GenericTabularInline):
+    """
+    Inline for the tags of an object.
+
+    The tag and user are entered by their id, so that the rows do not render
+    a choice of all tags and users.
+
+    """
+    form = TaggedItemInlineForm
     formset = TaggedItemInlineFormSet
     model = models.TaggedItem
+    raw_id_fields = TaggedItemInlineFormSet.bulk_fields
     extra = 1
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.raw_id_fields:
+            kwargs['form_class'] = BulkModelChoiceField
+            kwargs['widget'] = BulkRawIdWidget(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'))
+        return super(TaggedItemInline, self).formfield_for_foreignkey(
+            db_field, request, **kwargs)
+
+
+class TagAdmin(TranslatableAdmin):
+    actions = ['merge_tags']
+
+    def merge_tags(self, request, queryset):
+        tags = list(queryset.annotate(
+            num_items=Count('tagged_items')).order_by('-num_items', 'pk'))
+        if len(tags) < 2:
+            self.message_user(
+                request, _('Please select at least two tags to merge.'),
+                messages.WARNING)
+            return
+        target = models.Tag.objects.merge(tags[1:], tags[0])
+        self.message_user(request, _(
+            'Merged {0} tags into "{1}".').format(len(tags) - 1, target.slug))
+    merge_tags.short_description = _(
+        'Merge selected tags into the most used one')
+
+
+class TaggedItemAdmin(admin.ModelAdmin):
+    list_select_related = ('tag', 'content_type')
+
+    def get_queryset(self, request):
+        return super(TaggedItemAdmin, self).get_queryset(
+            request).with_objects()
+
+
+def register_models(site):
+    """Registers the models of ``REGISTER_ADMIN`` with the admin site."""
+    for model, model_admin in [(models.Tag, TagAdmin),
+                               (models.TaggedItem, TaggedItemAdmin)]:
+        if model.__name__ in app_settings.REGISTER_ADMIN:
+            site.register(model, model_admin)
+
 
-admin.site.register(models.Tag, TranslatableAdmin)
-admin.site.register(models.TaggedItem)
+register_models(admin.site)
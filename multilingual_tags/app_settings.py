@@ -0,0 +1,33 @@
+"""Settings of the ``multilingual_tags`` app."""
+from django.conf import settings
+
+
+#: Keeps the per content type usage of every tag in the ``TagCount`` table.
+USE_COUNTERS = getattr(settings, 'MULTILINGUAL_TAGS_USE_COUNTERS', False)
+
+#: Caches the names of the tags and the tags of each object.
+CACHE_ENABLED = getattr(settings, 'MULTILINGUAL_TAGS_CACHE_ENABLED', False)
+
+#: The cache of ``CACHES`` used for the tags.
+CACHE_ALIAS = getattr(settings, 'MULTILINGUAL_TAGS_CACHE_ALIAS', 'default')
+
+#: Seconds until a cached entry expires.
+CACHE_TIMEOUT = getattr(settings, 'MULTILINGUAL_TAGS_CACHE_TIMEOUT', 300)
+
+#: Prefix of all cache keys of the app.
+CACHE_KEY_PREFIX = getattr(
+    settings, 'MULTILINGUAL_TAGS_CACHE_KEY_PREFIX', 'multilingual_tags')
+
+#: Dotted path of a ``metrics.MetricsBackend`` subclass, that receives the
+#: duration, queries and counts of the tagging code paths.
+METRICS_BACKEND = getattr(settings, 'MULTILINGUAL_TAGS_METRICS_BACKEND', None)
+
+#: Keeps how often two tags are used on the same object in the
+#: ``TagCooccurrence`` table.
+USE_COOCCURRENCES = getattr(
+    settings, 'MULTILINGUAL_TAGS_USE_COOCCURRENCES', False)
+
+#: The names of the models, that are registered with the default admin site.
+#: Set it to ``()`` to register your own admins or none at all.
+REGISTER_ADMIN = getattr(
+    settings, 'MULTILINGUAL_TAGS_REGISTER_ADMIN', ('Tag', 'TaggedItem'))
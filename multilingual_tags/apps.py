@@ -0,0 +1,11 @@
+"""App configuration for the ``multilingual_tags`` app."""
+from django.apps import AppConfig
+
+
+class MultilingualTagsConfig(AppConfig):
+    name = 'multilingual_tags'
+
+    def ready(self):
+        from . import signals
+        if signals.receivers_needed():
+            signals.connect_receivers()
@@ -0,0 +1,34 @@
+"""
+Helpers to call the tagging code from async views.
+
+Django's ORM is synchronous, so the queries run in the worker threads of the
+event loop's executor. Unlike the thread sensitive ``sync_to_async``,
+concurrent calls do not wait for each other. Every worker thread uses its
+own database connection, which is closed like at the end of a request. The
+active language of the caller is activated in the worker thread.
+
+``asyncio`` is only imported when a helper is awaited, since importing it
+would be the largest part of loading the app in sync only processes.
+
+"""
+from functools import partial
+
+from django.db import close_old_connections
+from django.utils import translation
+
+
+def _call(language, func, args, kwargs):
+    close_old_connections()
+    try:
+        with translation.override(language):
+            return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_thread(func, *args, **kwargs):
+    """Runs the function in a worker thread and returns its result."""
+    import asyncio
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        None, partial(_call, translation.get_language(), func, args, kwargs))
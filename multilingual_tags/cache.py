@@ -0,0 +1,141 @@
+"""
+Cache for the tag names and the tags of objects.
+
+Only used if ``MULTILINGUAL_TAGS_CACHE_ENABLED`` is set, otherwise every
+function reads from the database. The entries are invalidated by the signal
+handlers of the app and by the bulk write paths, which also clears the
+request memo of ``memo``. The bulk write paths also invalidate parler's
+cache of the translations, which is not updated without the signals.
+
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+
+from parler import appsettings as parler_settings, cache as parler_cache
+
+from . import app_settings, memo, models
+
+
+def _get_cache():
+    return caches[app_settings.CACHE_ALIAS]
+
+
+def _get_names_key(tag_id):
+    return '{0}:names:{1}'.format(app_settings.CACHE_KEY_PREFIX, tag_id)
+
+
+def _get_obj_key(content_type_id, object_id):
+    return '{0}:obj:{1}:{2}'.format(
+        app_settings.CACHE_KEY_PREFIX, content_type_id, object_id)
+
+
+def get_tag_names(tag_ids):
+    """
+    Returns the slugs and names of the given tags.
+
+    The result maps each tag id to a ``(slug, {language: name})`` tuple and
+    leaves out deleted tags. Tags, that are missing in the cache, are fetched
+    with one query.
+
+    """
+    tag_ids = list(tag_ids)
+    result = {}
+    if app_settings.CACHE_ENABLED:
+        cached = _get_cache().get_many([_get_names_key(t) for t in tag_ids])
+        for tag_id in tag_ids:
+            if _get_names_key(tag_id) in cached:
+                result[tag_id] = cached[_get_names_key(tag_id)]
+        missing = [t for t in tag_ids if _get_names_key(t) not in cached]
+    else:
+        missing = tag_ids
+    if not missing:
+        return result
+
+    translations = models.Tag.objects.filter(pk__in=missing).values_list(
+        'pk', 'slug', 'translations__language_code', 'translations__name')
+    for tag_id, slug, language_code, name in translations:
+        names = result.setdefault(tag_id, (slug, {}))[1]
+        if language_code is not None:
+            names[language_code] = name
+    if app_settings.CACHE_ENABLED:
+        _get_cache().set_many(
+            {_get_names_key(tag_id): result[tag_id] for tag_id in missing
+             if tag_id in result},
+            app_settings.CACHE_TIMEOUT)
+    return result
+
+
+def get_tags_for_obj(obj):
+    """
+    Returns the ids of the tags of an object.
+
+    Only the ids are cached, so that the entry stays valid when a tag is
+    renamed.
+
+    """
+    content_type_id = ContentType.objects.get_for_model(obj).pk
+    key = _get_obj_key(content_type_id, obj.pk)
+    if app_settings.CACHE_ENABLED:
+        tag_ids = _get_cache().get(key)
+        if tag_ids is not None:
+            return tag_ids
+    tag_ids = list(models.TaggedItem.objects.filter(
+        content_type_id=content_type_id, object_id=obj.pk,
+    ).order_by('pk').values_list('tag_id', flat=True))
+    if app_settings.CACHE_ENABLED:
+        _get_cache().set(key, tag_ids, app_settings.CACHE_TIMEOUT)
+    return tag_ids
+
+
+def get_tag_name(names, tag_id, language):
+    """
+    Picks the name of a tag from the result of ``get_tag_names``.
+
+    Falls back to parler's fallback languages and finally to the slug.
+
+    """
+    slug, tag_names = names.get(tag_id, ('', {}))
+    for language_code in models.get_name_languages(language):
+        if tag_names.get(language_code):
+            return tag_names[language_code]
+    return slug
+
+
+def invalidate_tag(tag_id):
+    memo.clear()
+    if app_settings.CACHE_ENABLED:
+        _get_cache().delete(_get_names_key(tag_id))
+
+
+def invalidate_tags(tag_ids):
+    memo.clear()
+    if app_settings.CACHE_ENABLED:
+        _get_cache().delete_many([_get_names_key(t) for t in tag_ids])
+
+
+def invalidate_obj(content_type_id, object_id):
+    memo.clear()
+    if app_settings.CACHE_ENABLED:
+        _get_cache().delete(_get_obj_key(content_type_id, object_id))
+
+
+def invalidate_objs(content_type_id, object_ids):
+    memo.clear()
+    if app_settings.CACHE_ENABLED:
+        _get_cache().delete_many(
+            [_get_obj_key(content_type_id, pk) for pk in object_ids])
+
+
+def invalidate_translations(translations):
+    """
+    Deletes parler's cached translations of ``(tag_id, language)`` pairs.
+
+    Parler also caches missing translations, so the pairs of newly created
+    translations have to be invalidated as well.
+
+    """
+    if parler_settings.PARLER_ENABLE_CACHING:
+        parler_cache.cache.delete_many([
+            parler_cache.get_translation_cache_key(
+                models.TagTranslation, tag_id, language)
+            for tag_id, language in translations])
@@ -2,10 +2,11 @@
 from django import forms
 from django.forms.utils import ErrorList
 from django.contrib.contenttypes.models import ContentType
-from django.utils.text import slugify
-from django.utils.translation import ugettext_lazy as _
+from django.db import transaction
+from django.urls import NoReverseMatch, reverse
+from django.utils.translation import ugettext_lazy as _, get_language
 
-from .. import models
+from .. import app_settings, cache, metrics, models, signals
 
 
 class TaggingFormMixin(object):
@@ -18,21 +19,48 @@ class TaggingFormMixin(object):
         'max_tags': 0,
     }
 
+    def __init_subclass__(cls, **kwargs):
+        super(TaggingFormMixin, cls).__init_subclass__(**kwargs)
+        # resolves the field configuration once per form class
+        options = {
+            'name': 'tags',
+            'label': 'Tags',
+            'help_text': '',
+            'required': True,
+            'max_tags': 0,
+        }
+        options.update(cls.tag_field)
+        options['max_tags'] = int(options['max_tags'])
+        cls._tag_field_options = options
+        clean_name = 'clean_{0}'.format(options['name'])
+        own_clean = cls.__dict__.get(clean_name)
+        if own_clean is None:
+            if not hasattr(cls, clean_name):
+                setattr(cls, clean_name, cls._clean_tag_field)
+        elif own_clean is not cls._clean_tag_field:
+            # the entered tags are always collected, so that saving the form
+            # does not drop them, even if the form cleans the field itself
+            def clean_tag_field(self):
+                self._clean_tag_field()
+                return own_clean(self)
+            setattr(cls, clean_name, clean_tag_field)
+
     def __init__(self, *args, **kwargs):
         super(TaggingFormMixin, self).__init__(*args, **kwargs)
-        self._taggeditems = []
-        self._instance_ctype = None
-        self.fields[self._get_tag_field_name()] = forms.CharField(
+        self._tag_names = None
+        self._tags_collected = False
+        field = self.fields[self._get_tag_field_name()] = forms.CharField(
             label=self._get_tag_field_label(),
             help_text=self._get_tag_field_help_text(),
             initial=self._get_tag_field_initial(),
             required=self._get_tag_field_required(),
         )
-        self.fields[self._get_tag_field_name()].widget.attrs.update({
+        field.widget.attrs.update({
             'data-class': 'multilingual-tags-field',
             'data-max-tags': self._get_tag_field_max_tags()})
-        setattr(self, 'clean_{0}'.format(self._get_tag_field_name()),
-                self._get_tag_field_clean())
+        tags_url = self._get_tag_field_tags_url()
+        if tags_url:
+            field.widget.attrs['data-tags-url'] = tags_url
 
     def add_error(self, fieldname, message):
         if fieldname in self._errors:
@@ -41,89 +69,158 @@ class TaggingFormMixin(object):
             self._errors[fieldname] = ErrorList()
             self._errors[fieldname].append(message)
 
-    def _get_tag_field_clean(self):
-        def clean_field():
-            self._tags_added = []
-            self._taggeditems = []
-            max_tags = self._get_tag_field_max_tags()
-
-            data = self.data.get(self._get_tag_field_name())
-            if not data:
-                return []
-            tag_data = [t.strip() for t in data.split(',')]
-            self._instance_ctype = ContentType.objects.get_for_model(
-                self.instance)
-            for tag_string in tag_data:
-                if len(tag_string) > 64:
-                    self.add_error(
-                        self._get_tag_field_name(),
-                        _('Tags cannot be longer than 64 characters:'
-                          ' "{0}"'.format(tag_string))
-                    )
-                    continue
-                try:
-                    tag = models.Tag.objects.get(
-                        slug=slugify(tag_string))
-                except models.Tag.DoesNotExist:
-                    # TODO tags should not be stored directly
-                    tag = models.Tag.objects.create(
-                        slug=slugify(tag_string),
-                        name=tag_string,
-                    )
-                # prevent duplicate tags
-                if tag not in self._tags_added:
-                    self._tags_added.append(tag)
-                    if self.instance.id:
-                        taggeditem, created = (
-                            models.TaggedItem.objects.get_or_create(
-                                tag=tag,
-                                content_type=self._instance_ctype,
-                                object_id=self.instance.id,
-                            )
-                        )
-                    else:
-                        taggeditem = models.TaggedItem(
-                            tag=tag,
-                            content_type=self._instance_ctype)
-                    self._taggeditems.append(taggeditem)
-                if max_tags and len(self._tags_added) > max_tags:
-                    self.add_error(
-                        self._get_tag_field_name(),
-                        _('You cannot add more than {0} tags.'.format(
-                            self._get_tag_field_max_tags()
-                        ))
-                    )
-            return self._taggeditems
-        return clean_field
+    def full_clean(self):
+        self._tags_collected = False
+        super(TaggingFormMixin, self).full_clean()
+
+    def _clean_tag_field(self):
+        # collects the tags once per full_clean, even if the clean methods
+        # of several form classes call each other with super()
+        if not self._tags_collected:
+            self._tags_collected = True
+            with metrics.instrument('form.clean') as counts:
+                counts['tags'] = len(self._validate_tag_names())
+        return self._tag_names or []
+
+    def _validate_tag_names(self):
+        """
+        Collects the entered tag names and adds errors for invalid ones.
+
+        The names stay ``None`` if the field was not submitted at all, so
+        that saving the form leaves the stored tags alone.
+
+        """
+        self._tag_names = None
+        name = self._get_tag_field_name()
+        max_tags = self._get_tag_field_max_tags()
+
+        widget = self.fields[name].widget
+        if widget.value_omitted_from_data(
+                self.data, self.files, self.add_prefix(name)):
+            return []
+        self._tag_names = []
+        # the value of the field, which is read with the form's prefix
+        data = self.cleaned_data.get(name)
+        if not data:
+            return []
+        slugs = set()
+        for tag_string in [t.strip() for t in data.split(',')]:
+            if len(tag_string) > 64:
+                self.add_error(
+                    name,
+                    _('Tags cannot be longer than 64 characters:'
+                      ' "{0}"'.format(tag_string))
+                )
+                continue
+            if not tag_string:
+                continue
+            # prevent duplicate tags
+            slug = models.get_slug(tag_string)
+            if slug not in slugs:
+                slugs.add(slug)
+                self._tag_names.append(tag_string)
+        if max_tags and len(self._tag_names) > max_tags:
+            self.add_error(
+                name,
+                _('You cannot add more than {0} tags.'.format(max_tags))
+            )
+        return self._tag_names
 
     def _get_tag_field_help_text(self):
-        return self.tag_field.get('help_text', '')
+        return self._tag_field_options['help_text']
 
     def _get_tag_field_initial(self):
-        tag_model_field = getattr(self.instance, self._get_tag_field_name())
-        return ','.join([ti.tag.name for ti in tag_model_field.all()])
+        if not self.instance.pk:
+            return ''
+        if hasattr(self.instance, 'prefetched_tags'):
+            # attached by ``utils.prefetch_tags``, e.g. for a formset
+            return ','.join(str(tag) for tag in self.instance.prefetched_tags)
+        tag_ids = cache.get_tags_for_obj(self.instance)
+        names = cache.get_tag_names(tag_ids)
+        language = get_language()
+        return ','.join(
+            [cache.get_tag_name(names, tag_id, language)
+             for tag_id in tag_ids])
 
     def _get_tag_field_label(self):
-        return self.tag_field.get('label', 'Tags')
+        return self._tag_field_options['label']
 
     def _get_tag_field_max_tags(self):
-        return int(self.tag_field.get('max_tags', 0))
+        return self._tag_field_options['max_tags']
 
     def _get_tag_field_name(self):
-        return self.tag_field.get('name', 'tags')
+        return self._tag_field_options['name']
+
+    def _get_tag_field_tags_url(self):
+        if 'tags_url' in self._tag_field_options:
+            return self._tag_field_options['tags_url']
+        try:
+            return reverse('multilingual_tags_autocomplete')
+        except NoReverseMatch:
+            return None
 
     def _get_tag_field_required(self):
-        return self.tag_field.get('required', True)
+        return self._tag_field_options['required']
 
     def save(self, commit=True):
         instance = super(TaggingFormMixin, self).save(commit)
-        for item in self._taggeditems:
-            if hasattr(instance, 'get_user'):
-                item.user = instance.get_user()
-            item.object_id = instance.id
-            item.save()
-        models.TaggedItem.objects.filter(
-            content_type=self._instance_ctype,
-            object_id=instance.id).exclude(
-            pk__in=[ti.pk for ti in self._taggeditems]).delete()
+        if commit:
+            self._save_tagged_items(instance)
+        else:
+            save_m2m = self.save_m2m
+
+            def save_tagged_items():
+                save_m2m()
+                self._save_tagged_items(self.instance)
+            self.save_m2m = save_tagged_items
         return instance
+
+    def _save_tagged_items(self, instance):
+        """
+        Writes the difference between the entered and the stored tags.
+
+        The tags are only created here, so that an invalid form does not
+        leave any rows behind. The number of queries does not depend on the
+        number of tags. Nothing is written if the tag field was not
+        submitted.
+
+        """
+        if self._tag_names is None:
+            return
+        ctype = ContentType.objects.get_for_model(instance)
+        user = None
+        if hasattr(instance, 'get_user'):
+            user = instance.get_user()
+        instrumented = metrics.instrument(
+            'form.save', tags=len(self._tag_names))
+        with instrumented as counts, transaction.atomic():
+            tags = models.Tag.objects.get_or_create_many(self._tag_names)
+            tag_ids = set(tag.pk for tag in tags)
+            items = models.TaggedItem.objects.filter(
+                content_type=ctype, object_id=instance.id)
+            existing_ids = set(items.values_list('tag_id', flat=True))
+            # keeps the entered order of the tags for new items
+            added_ids = [tag.pk for tag in tags if tag.pk not in existing_ids]
+            removed_ids = existing_ids - tag_ids
+            counts.update(items_added=len(added_ids),
+                          items_removed=len(removed_ids))
+            models.TaggedItem.objects.bulk_create([
+                models.TaggedItem(
+                    tag_id=tag_id,
+                    content_type=ctype,
+                    object_id=instance.id,
+                    user=user,
+                ) for tag_id in added_ids
+            ], ignore_conflicts=True)
+            if removed_ids:
+                with signals.counters_muted():
+                    items.filter(tag_id__in=removed_ids).delete()
+            if app_settings.USE_COUNTERS:
+                models.TagCount.objects.update_counts(
+                    ctype.pk, added_ids, 1)
+                models.TagCount.objects.update_counts(
+                    ctype.pk, removed_ids, -1)
+            if app_settings.USE_COOCCURRENCES:
+                models.TagCooccurrence.objects.update_for_object(
+                    ctype.pk, existing_ids, tag_ids)
+        cache.invalidate_obj(ctype.pk, instance.id)
@@ -0,0 +1,104 @@
+"""Streams all tags, their translations and the tagged items to a file."""
+import csv
+import json
+
+from django.core.management.base import BaseCommand
+
+from ...models import Tag, TaggedItem
+
+
+#: Columns of the CSV format. Tags use one row per translation.
+CSV_FIELDS = ['type', 'slug', 'language_code', 'name', 'app_label', 'model',
+              'object_id']
+
+
+class Command(BaseCommand):
+    help = (
+        'Exports the tags with all translations and the tagged items as JSON'
+        ' Lines or CSV. The rows are streamed, so the memory usage does not'
+        ' depend on the size of the tables.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=['jsonl', 'csv'], default='jsonl',
+            help='The output format. Defaults to jsonl.')
+        parser.add_argument(
+            '--output', help='The file to write to. Defaults to stdout.')
+        parser.add_argument(
+            '--tags-only', action='store_true',
+            help='Only exports the tags, not the tagged items.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of rows fetched from the database at once.')
+
+    def iter_tags(self, chunk_size):
+        """Yields ``(slug, {language_code: name})`` for every tag."""
+        rows = Tag.objects.order_by('pk', 'translations__language_code')
+        rows = rows.values_list(
+            'slug', 'translations__language_code', 'translations__name')
+        slug, translations = None, {}
+        for row_slug, language_code, name in rows.iterator(
+                chunk_size=chunk_size):
+            if row_slug != slug:
+                if slug is not None:
+                    yield slug, translations
+                slug, translations = row_slug, {}
+            if language_code:
+                translations[language_code] = name
+        if slug is not None:
+            yield slug, translations
+
+    def iter_items(self, chunk_size):
+        """Yields ``(tag slug, app_label, model, object_id)`` tuples."""
+        rows = TaggedItem.objects.order_by('pk').values_list(
+            'tag__slug', 'content_type__app_label', 'content_type__model',
+            'object_id')
+        return rows.iterator(chunk_size=chunk_size)
+
+    def write_jsonl(self, stream, tags, items):
+        count = 0
+        for slug, translations in tags:
+            stream.write(json.dumps({
+                'type': 'tag', 'slug': slug, 'translations': translations,
+            }) + '\n')
+            count += 1
+        for slug, app_label, model, object_id in items:
+            stream.write(json.dumps({
+                'type': 'item', 'tag': slug,
+                'content_type': [app_label, model], 'object_id': object_id,
+            }) + '\n')
+            count += 1
+        return count
+
+    def write_csv(self, stream, tags, items):
+        count = 0
+        writer = csv.DictWriter(stream, CSV_FIELDS)
+        writer.writeheader()
+        for slug, translations in tags:
+            for language_code, name in sorted(translations.items()) or [
+                    ('', '')]:
+                writer.writerow({
+                    'type': 'tag', 'slug': slug,
+                    'language_code': language_code, 'name': name,
+                })
+            count += 1
+        for slug, app_label, model, object_id in items:
+            writer.writerow({
+                'type': 'item', 'slug': slug, 'app_label': app_label,
+                'model': model, 'object_id': object_id,
+            })
+            count += 1
+        return count
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        tags = self.iter_tags(chunk_size)
+        items = [] if options['tags_only'] else self.iter_items(chunk_size)
+        write = getattr(self, 'write_{0}'.format(options['format']))
+        if options['output']:
+            with open(options['output'], 'w', newline='',
+                      encoding='utf-8') as stream:
+                count = write(stream, tags, items)
+        else:
+            count = write(self.stdout, tags, items)
+        self.stderr.write('Exported {0} records.'.format(count))
@@ -0,0 +1,204 @@
+"""Imports tags and tagged items written by the ``export_tags`` command."""
+import csv
+import json
+import sys
+from collections import OrderedDict, defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ... import app_settings, cache
+from ...models import (
+    Tag, TagCooccurrence, TagCount, TaggedItem, TagTranslation,
+    normalize_name)
+from .export_tags import CSV_FIELDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports tags, their translations and tagged items from a JSON Lines'
+        ' or CSV file created by export_tags. Existing tags are matched by'
+        ' their slug, so the import can be repeated safely. Every batch is'
+        ' written in its own transaction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', nargs='?',
+            help='The file to read from. Defaults to stdin.')
+        parser.add_argument(
+            '--format', choices=['jsonl', 'csv'], default='jsonl',
+            help='The input format. Defaults to jsonl.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of records written to the database at once.')
+
+    def iter_jsonl(self, stream):
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise CommandError('Invalid JSON in line {0}.'.format(
+                    line_number))
+
+    def iter_csv(self, stream):
+        reader = csv.DictReader(stream)
+        missing = set(CSV_FIELDS) - set(reader.fieldnames or [])
+        if missing:
+            raise CommandError('Missing CSV columns: {0}.'.format(
+                ', '.join(sorted(missing))))
+        for row in reader:
+            if row['type'] == 'tag':
+                translations = {}
+                if row['language_code']:
+                    translations[row['language_code']] = row['name']
+                yield {'type': 'tag', 'slug': row['slug'],
+                       'translations': translations}
+            else:
+                yield {'type': 'item', 'tag': row['slug'],
+                       'content_type': [row['app_label'], row['model']],
+                       'object_id': row['object_id']}
+
+    def parse_record(self, record):
+        """
+        Returns a ``('tag', (slug, translations))`` or an ``('item', (slug,
+        app_label, model, object_id))`` tuple for a record.
+
+        """
+        try:
+            if record.get('type') == 'tag':
+                return 'tag', (str(record['slug']),
+                               dict(record.get('translations') or {}))
+            if record.get('type') == 'item':
+                app_label, model = record['content_type']
+                return 'item', (str(record['tag']), app_label, model,
+                                int(record['object_id']))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            raise CommandError('Invalid record: {0}'.format(record))
+        raise CommandError('Unknown record: {0}'.format(record))
+
+    @transaction.atomic
+    def import_tags(self, tags):
+        """Upserts a ``{slug: {language_code: name}}`` batch of tags."""
+        existing = set(Tag.objects.filter(slug__in=tags.keys()).values_list(
+            'slug', flat=True))
+        Tag.objects.bulk_create([
+            Tag(slug=slug) for slug in tags if slug not in existing])
+        tag_ids = dict(Tag.objects.filter(slug__in=tags.keys()).values_list(
+            'slug', 'pk'))
+
+        translations = {
+            (t.master_id, t.language_code): t
+            for t in TagTranslation.objects.filter(
+                master_id__in=tag_ids.values())}
+        new_translations, changed_translations = [], []
+        for slug, names in tags.items():
+            for language_code, name in names.items():
+                translation = translations.get(
+                    (tag_ids[slug], language_code))
+                if translation is None:
+                    new_translations.append(TagTranslation(
+                        master_id=tag_ids[slug],
+                        language_code=language_code,
+                        name=name,
+                        normalized_name=normalize_name(name),
+                    ))
+                elif translation.name != name:
+                    translation.name = name
+                    translation.normalized_name = normalize_name(name)
+                    changed_translations.append(translation)
+        TagTranslation.objects.bulk_create(new_translations)
+        TagTranslation.objects.bulk_update(
+            changed_translations, ['name', 'normalized_name'])
+        cache.invalidate_tags(tag_ids.values())
+        cache.invalidate_translations(
+            (t.master_id, t.language_code)
+            for t in new_translations + changed_translations)
+        self.counts['tags'] += len(tags)
+
+    @transaction.atomic
+    def import_items(self, items):
+        """Inserts a batch of ``(slug, app_label, model, object_id)``."""
+        tag_ids = dict(Tag.objects.filter(
+            slug__in=set(item[0] for item in items)).values_list(
+            'slug', 'pk'))
+        new_items = defaultdict(set)
+        for slug, app_label, model, object_id in items:
+            try:
+                ctype = ContentType.objects.get_by_natural_key(
+                    app_label, model)
+            except ContentType.DoesNotExist:
+                ctype = None
+            if ctype is None or slug not in tag_ids:
+                self.counts['skipped'] += 1
+                continue
+            new_items[ctype.pk].add((object_id, tag_ids[slug]))
+        for content_type_id, pairs in new_items.items():
+            # only the missing items are counted as imported
+            pairs -= set(TaggedItem.objects.filter(
+                content_type_id=content_type_id,
+                object_id__in=set(object_id for object_id, _ in pairs),
+                tag_id__in=set(tag_id for _, tag_id in pairs),
+            ).values_list('object_id', 'tag_id'))
+            TaggedItem.objects.bulk_create([
+                TaggedItem(tag_id=tag_id, content_type_id=content_type_id,
+                           object_id=object_id)
+                for object_id, tag_id in pairs], ignore_conflicts=True)
+            cache.invalidate_objs(
+                content_type_id, set(object_id for object_id, _ in pairs))
+            self.tag_ids.update(tag_id for _, tag_id in pairs)
+            self.counts['items'] += len(pairs)
+
+    def rebuild(self, batch_size):
+        """Rebuilds the counts of the tags of the imported items."""
+        tag_ids = sorted(self.tag_ids)
+        for i in range(0, len(tag_ids), batch_size):
+            if app_settings.USE_COUNTERS:
+                TagCount.objects.rebuild(tag_ids=tag_ids[i:i + batch_size])
+            if app_settings.USE_COOCCURRENCES:
+                TagCooccurrence.objects.rebuild(
+                    tag_ids=tag_ids[i:i + batch_size])
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.counts = {'tags': 0, 'items': 0, 'skipped': 0}
+        # the tags of the imported items, whose counts are rebuilt
+        self.tag_ids = set()
+        tags, items = OrderedDict(), []
+        if options['input']:
+            stream = open(options['input'], newline='', encoding='utf-8')
+        else:
+            stream = sys.stdin
+        try:
+            records = getattr(self, 'iter_{0}'.format(options['format']))(
+                stream)
+            for record in records:
+                record_type, value = self.parse_record(record)
+                if record_type == 'tag':
+                    slug, translations = value
+                    tags.setdefault(slug, {}).update(translations)
+                else:
+                    if tags:
+                        # items can only be stored for existing tags
+                        self.import_tags(tags)
+                        tags = OrderedDict()
+                    items.append(value)
+                if len(tags) >= batch_size:
+                    self.import_tags(tags)
+                    tags = OrderedDict()
+                if len(items) >= batch_size:
+                    self.import_items(items)
+                    items = []
+            if tags:
+                self.import_tags(tags)
+            if items:
+                self.import_items(items)
+            self.rebuild(batch_size)
+        finally:
+            if options['input']:
+                stream.close()
+        self.stderr.write(
+            'Imported {tags} tags and {items} tagged items, skipped {skipped}'
+            ' items.'.format(**self.counts))
@@ -0,0 +1,25 @@
+"""Merges tags into another tag."""
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Tag
+
+
+class Command(BaseCommand):
+    help = 'Merges the source tags into the target tag and deletes them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', help='The slug of the tag to keep.')
+        parser.add_argument('sources', nargs='+',
+                            help='The slugs of the tags to merge.')
+
+    def handle(self, *args, **options):
+        slugs = [options['target']] + options['sources']
+        tags = Tag.objects.in_bulk(slugs, field_name='slug')
+        missing = [slug for slug in slugs if slug not in tags]
+        if missing:
+            raise CommandError('Unknown tags: {0}'.format(', '.join(missing)))
+        Tag.objects.merge(
+            [tags[slug] for slug in options['sources']],
+            tags[options['target']])
+        self.stdout.write('Merged {0} into {1}.'.format(
+            ', '.join(options['sources']), options['target']))
@@ -0,0 +1,24 @@
+"""Deletes all tags, that are not used."""
+from django.core.management.base import BaseCommand
+
+from ...models import Tag
+
+
+class Command(BaseCommand):
+    help = 'Deletes all tags without tagged items in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of tags deleted per transaction.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only counts the unused tags.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = Tag.objects.filter(tagged_items__isnull=True).count()
+            self.stdout.write('Found {0} unused tags.'.format(count))
+            return
+        count = Tag.objects.prune(batch_size=options['batch_size'])
+        self.stdout.write('Deleted {0} unused tags.'.format(count))
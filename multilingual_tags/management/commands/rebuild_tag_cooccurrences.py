@@ -0,0 +1,20 @@
+"""Recreates the denormalised co-occurrences of all tags."""
+from django.core.management.base import BaseCommand
+
+from ...models import TagCooccurrence
+
+
+class Command(BaseCommand):
+    help = (
+        'Recreates how often two tags are used on the same object from the'
+        ' tagged items.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of pairs to insert per query.')
+
+    def handle(self, *args, **options):
+        TagCooccurrence.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write('Rebuilt {0} tag co-occurrences.'.format(
+            TagCooccurrence.objects.count()))
@@ -0,0 +1,18 @@
+"""Recreates the denormalised usage counters of all tags."""
+from django.core.management.base import BaseCommand
+
+from ...models import TagCount
+
+
+class Command(BaseCommand):
+    help = 'Recreates the usage counters of all tags from the tagged items.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of counters to insert per query.')
+
+    def handle(self, *args, **options):
+        TagCount.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write('Rebuilt {0} tag counters.'.format(
+            TagCount.objects.count()))
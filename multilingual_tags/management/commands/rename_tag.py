@@ -0,0 +1,26 @@
+"""Renames a tag."""
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Tag
+
+
+class Command(BaseCommand):
+    help = (
+        'Renames a tag in one language and updates its slug. If another tag'
+        ' already uses the new slug, the tag is merged into it.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug', help='The slug of the tag to rename.')
+        parser.add_argument('name', help='The new name of the tag.')
+        parser.add_argument(
+            '--language', help='The language of the name. Defaults to the'
+            ' default language.')
+
+    def handle(self, *args, **options):
+        try:
+            tag = Tag.objects.get(slug=options['slug'])
+        except Tag.DoesNotExist:
+            raise CommandError('Unknown tag: {0}'.format(options['slug']))
+        tag = Tag.objects.rename(tag, options['name'], options['language'])
+        self.stdout.write('Renamed {0} to {1}.'.format(
+            options['slug'], tag.slug))
@@ -0,0 +1,63 @@
+"""
+Memo for the tag lookups of a single request.
+
+The memo is only active within ``activated``, e.g. for every request handled
+by ``middleware.TagMemoMiddleware``. While it is active, ``get_for_obj`` and
+``get_for_model`` return the tags read by the first call for the same
+language and object or model. It is dropped at the end of the request and
+whenever tags or tagged items are written.
+
+"""
+import threading
+from contextlib import contextmanager
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils.translation import get_language
+
+from . import models
+
+
+_local = threading.local()
+
+
+@contextmanager
+def activated():
+    """Activates an empty memo for the current thread."""
+    previous = getattr(_local, 'memo', None)
+    _local.memo = {}
+    try:
+        yield
+    finally:
+        _local.memo = previous
+
+
+def clear():
+    """Drops all memoised lookups of the current thread."""
+    memo = getattr(_local, 'memo', None)
+    if memo:
+        memo.clear()
+
+
+def _get(key, func):
+    memo = getattr(_local, 'memo', None)
+    if memo is None:
+        return func()
+    if key not in memo:
+        memo[key] = func()
+    return memo[key]
+
+
+def get_for_obj(obj):
+    """Returns the tags of ``Tag.objects.get_for_obj`` as a list."""
+    content_type_id = ContentType.objects.get_for_model(obj).pk
+    return _get(
+        ('obj', get_language(), content_type_id, obj.pk),
+        lambda: list(models.Tag.objects.get_for_obj(obj)))
+
+
+def get_for_model(model):
+    """Returns the tags of ``Tag.objects.get_for_model`` as a list."""
+    content_type_id = ContentType.objects.get_for_model(model).pk
+    return _get(
+        ('model', get_language(), content_type_id),
+        lambda: list(models.Tag.objects.get_for_model(model)))
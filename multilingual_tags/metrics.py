@@ -0,0 +1,69 @@
+"""
+Instrumentation of the tagging code paths.
+
+Only active if ``MULTILINGUAL_TAGS_METRICS_BACKEND`` is set, otherwise
+``instrument`` neither counts queries nor measures the time.
+
+"""
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from . import app_settings
+
+
+class MetricsBackend(object):
+    """Base class of the metrics backends, that ignores every call."""
+
+    def record(self, name, duration, queries, **counts):
+        """
+        Records one call of an instrumented code path.
+
+        :name: The name of the code path, e.g. ``'form.save'``.
+        :duration: The wall time of the call in seconds.
+        :queries: The number of queries the call issued.
+        :counts: The counts of the call, e.g. ``tags_created``.
+
+        """
+
+
+@lru_cache()
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_backend():
+    """Returns the configured backend or ``None``."""
+    if not app_settings.METRICS_BACKEND:
+        return None
+    return _load_backend(app_settings.METRICS_BACKEND)
+
+
+@contextmanager
+def instrument(name, **counts):
+    """
+    Reports the duration and queries of the block to the backend.
+
+    Yields the dictionary of counts, that the block can update.
+
+    """
+    backend = get_backend()
+    if backend is None:
+        yield counts
+        return
+    queries = [0]
+
+    def count_query(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(count_query):
+            yield counts
+    finally:
+        backend.record(name, time.perf_counter() - start, queries[0],
+                       **counts)
@@ -0,0 +1,13 @@
+"""Middlewares for the ``multilingual_tags`` app."""
+from . import memo
+
+
+class TagMemoMiddleware(object):
+    """Activates the tag lookup memo of ``memo`` for each request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with memo.activated():
+            return self.get_response(request)
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-18 05:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('multilingual_tags', '0002_auto_20220501_0541'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_counts', to='contenttypes.ContentType')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counts', to='multilingual_tags.Tag', verbose_name='Tag')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tagcount',
+            index=models.Index(fields=['content_type', '-count'], name='multilingual_tagcount_popular'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='tagcount',
+            unique_together={('tag', 'content_type')},
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.28 on 2026-10-18 05:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multilingual_tags', '0003_tagcount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taggeditem',
+            index=models.Index(fields=['tag', 'content_type', 'object_id'], name='multilingual_ti_tag_ctype'),
+        ),
+        migrations.AddIndex(
+            model_name='taggeditem',
+            index=models.Index(fields=['content_type', 'tag'], name='multilingual_ti_ctype_tag'),
+        ),
+        migrations.AddIndex(
+            model_name='tagtranslation',
+            index=models.Index(fields=['language_code', 'name'], name='multilingual_tagtrans_name'),
+        ),
+    ]
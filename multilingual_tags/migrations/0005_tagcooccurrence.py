@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 05:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('multilingual_tags', '0004_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagCooccurrence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_cooccurrences', to='contenttypes.ContentType')),
+                ('related_tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reverse_cooccurrences', to='multilingual_tags.Tag', verbose_name='Related tag')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cooccurrences', to='multilingual_tags.Tag', verbose_name='Tag')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tagcooccurrence',
+            index=models.Index(fields=['tag', 'content_type', '-count'], name='multilingual_tagcooc_top'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='tagcooccurrence',
+            unique_together={('tag', 'related_tag', 'content_type')},
+        ),
+    ]
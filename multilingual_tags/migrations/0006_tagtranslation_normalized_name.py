@@ -0,0 +1,45 @@
+# Generated by Django 2.2.28 on 2026-10-18 05:36
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def normalize_name(name):
+    # a copy of ``models.normalize_name`` at the time of this migration
+    return ' '.join(unicodedata.normalize('NFKC', name).casefold().split())
+
+
+def set_normalized_names(apps, schema_editor):
+    TagTranslation = apps.get_model('multilingual_tags', 'TagTranslation')
+    translations = TagTranslation.objects.order_by('pk').only('pk', 'name')
+    batch = list(translations[:BATCH_SIZE])
+    while batch:
+        for translation in batch:
+            translation.normalized_name = normalize_name(translation.name)
+        TagTranslation.objects.bulk_update(batch, ['normalized_name'])
+        batch = list(translations.filter(
+            pk__gt=batch[-1].pk)[:BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multilingual_tags', '0005_tagcooccurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tagtranslation',
+            name='normalized_name',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Normalized name'),
+        ),
+        migrations.AddIndex(
+            model_name='tagtranslation',
+            index=models.Index(fields=['language_code', 'normalized_name'], name='multilingual_tagtrans_norm'),
+        ),
+        migrations.RunPython(set_normalized_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 05:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multilingual_tags', '0006_tagtranslation_normalized_name'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tagtranslation',
+            name='multilingual_tagtrans_norm',
+        ),
+        migrations.AddIndex(
+            model_name='tagtranslation',
+            index=models.Index(fields=['language_code', 'normalized_name'], name='multilingual_tagtrans_norm', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ),
+    ]
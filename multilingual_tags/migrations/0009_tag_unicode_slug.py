@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('multilingual_tags', '0008_taggeditem_drop_fk_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='slug',
+            field=models.SlugField(allow_unicode=True, max_length=64, unique=True, verbose_name='Slug'),
+        ),
+    ]
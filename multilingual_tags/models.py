@@ -1,40 +1,499 @@
 """Models for the `multilingual_tags` app."""
+import hashlib
+import unicodedata
+from collections import defaultdict
+
 from django.contrib.contenttypes import fields, models as ctype_models
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, functions
+from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _, get_language
 from django.conf import settings
 
-from parler.managers import TranslatableManager
+from parler import appsettings as parler_settings
+from parler.managers import TranslatableManager, TranslatableQuerySet
 from parler.models import TranslatableModel, TranslatedFields
+from parler.utils.i18n import get_language as get_parler_language
+
+from . import app_settings, cache, metrics
+from .async_utils import run_in_thread
+
+
+def get_name_languages(language=None):
+    """Returns the given or active language followed by its fallbacks."""
+    language = language or get_parler_language()
+    return [language] + [
+        code for code in
+        parler_settings.PARLER_LANGUAGES.get_fallback_languages(language)
+        if code != language]
+
+
+def normalize_name(name):
+    """
+    Returns the form of a tag name used to find equal names.
+
+    The name is NFKC normalised and casefolded and its whitespace is
+    collapsed, so that names only differing in these are the same tag.
+
+    """
+    return ' '.join(unicodedata.normalize('NFKC', name).casefold().split())
+
+
+def get_slug(name):
+    """
+    Returns the slug of a new tag name.
+
+    Names are slugified to ASCII where possible. Names without any ASCII
+    letters or digits, e.g. in another script, keep their unicode letters
+    and names without any letters get a slug from a hash of their
+    normalised form, so that every non-blank name gets a usable slug.
+
+    """
+    slug = slugify(name) or slugify(name, allow_unicode=True)
+    slug = slug[:64].strip('-')
+    if not slug:
+        digest = hashlib.sha1(normalize_name(name).encode('utf-8'))
+        slug = 'tag-{0}'.format(digest.hexdigest()[:12])
+    return slug
+
+
+def get_display_name(tag_ref='pk', language=None):
+    """
+    Returns an expression for the name of a tag.
+
+    The name is taken from the given or active language, its fallback
+    languages or finally the slug, all within the same query.
 
+    :tag_ref: The field, that references the tag, e.g. ``'tag'`` when
+      annotating tagged items.
 
-class TagManager(TranslatableManager):
+    """
+    names = [
+        models.Subquery(TagTranslation.objects.filter(
+            master=OuterRef(tag_ref), language_code=code,
+        ).exclude(name='').values('name')[:1])
+        for code in get_name_languages(language)]
+    slug = 'slug' if tag_ref == 'pk' else '{0}__slug'.format(tag_ref)
+    return functions.Coalesce(
+        *names, models.F(slug), output_field=models.CharField())
+
+
+class TagQuerySet(TranslatableQuerySet):
+    """QuerySet for the `Tag` model."""
+    def delete(self):
+        """
+        Deletes the tags with their tagged items, counters and
+        co-occurrences.
+
+        The counters and co-occurrences of the tags are deleted with them,
+        so the per item updates of the signal handlers are muted.
+
+        """
+        # the signal handlers need the models
+        from . import signals
+
+        with signals.counters_muted():
+            return super(TagQuerySet, self).delete()
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def with_names(self, language=None):
+        """
+        Annotates the name of each tag as ``display_name``.
+
+        Tags without a translation in the given or active language get the
+        name in a fallback language or their slug, so that printing them
+        needs no further queries.
+
+        """
+        language = language or get_parler_language()
+        return self.language(language).annotate(
+            display_name=get_display_name(language=language))
+
+    def stream(self, chunk_size=2000):
+        """
+        Yields the tags ordered by id without caching them.
+
+        The rows are read in chunks, from a server-side cursor on databases
+        supporting them, so that large listings run in bounded memory.
+
+        """
+        for tag in self.order_by('pk').iterator(chunk_size=chunk_size):
+            if self._language:
+                tag.set_current_language(self._language)
+            yield tag
+
+    def page_after(self, pk=None, page_size=1000):
+        """
+        Returns the page of tags with the next ids after ``pk``.
+
+        Pages are read by id instead of an offset, so that deep pages are as
+        fast as the first one. Pass the id of the last tag of a page to get
+        the next page.
+
+        """
+        qs = self.order_by('pk')
+        if pk is not None:
+            qs = qs.filter(pk__gt=pk)
+        return list(qs[:page_size])
+
+    def pages(self, page_size=1000):
+        """Yields all tags as lists of ``page_size`` tags ordered by id."""
+        page = self.page_after(page_size=page_size)
+        while page:
+            yield page
+            if len(page) < page_size:
+                return
+            page = self.page_after(page[-1].pk, page_size)
+
+
+class TagManager(TranslatableManager.from_queryset(TagQuerySet)):
     """Manager for the `Tag` model."""
+    def _get_for_items(self, **lookups):
+        """
+        Returns the tags, that have tagged items matching the lookups.
+
+        The items are checked with an ``EXISTS`` semi-join, which stops at the
+        first item of each tag, instead of joining all items and removing the
+        duplicate tags with ``DISTINCT``.
+
+        """
+        items = TaggedItem.objects.filter(tag=OuterRef('pk'), **lookups)
+        return Tag.objects.with_names(get_language()).annotate(
+            has_items=models.Exists(items)).filter(has_items=True)
+
     def get_for_model(self, obj):
         """Returns the tags for a specific model/content type."""
-        qs = Tag.objects.language(get_language())
-        qs = qs.filter(
-            tagged_items__content_type=ctype_models.ContentType.objects.get_for_model(obj))  # NOQA
-        return qs.distinct()
+        return self._get_for_items(
+            content_type=ctype_models.ContentType.objects.get_for_model(obj))
 
     def get_for_obj(self, obj):
         """Returns the tags for a specific object."""
-        qs = Tag.objects.language(get_language())
-        qs = qs.filter(
-            tagged_items__object_id=obj.id,
-            tagged_items__content_type=ctype_models.ContentType.objects.get_for_model(obj))  # NOQA
-        return qs.distinct()
+        return self._get_for_items(
+            object_id=obj.id,
+            content_type=ctype_models.ContentType.objects.get_for_model(obj))
 
     def get_for_queryset(self, obj_queryset):
-        """Returns all tags for a whole queryset of objects."""
-        qs = Tag.objects.language(get_language())
-        if obj_queryset.count() == 0:
-            return qs.none()
-        qs = qs.filter(
-            tagged_items__object_id__in=[
-                obj.id for obj in obj_queryset],
-            tagged_items__content_type=ctype_models.ContentType.objects.get_for_model(obj_queryset[0]))  # NOQA
-        return qs.distinct()
+        """
+        Returns all tags for a whole queryset of objects.
+
+        The objects are filtered with a subquery, so the queryset is neither
+        evaluated nor loaded into memory.
+
+        """
+        return self._get_for_items(
+            object_id__in=obj_queryset.values('pk'),
+            content_type=ctype_models.ContentType.objects.get_for_model(
+                obj_queryset.model))
+
+    async def aget_for_model(self, obj):
+        """Async version of ``get_for_model``, that returns a list."""
+        return await run_in_thread(lambda: list(self.get_for_model(obj)))
+
+    async def aget_for_obj(self, obj):
+        """Async version of ``get_for_obj``, that returns a list."""
+        return await run_in_thread(lambda: list(self.get_for_obj(obj)))
+
+    async def aget_for_queryset(self, obj_queryset):
+        """Async version of ``get_for_queryset``, that returns a list."""
+        return await run_in_thread(
+            lambda: list(self.get_for_queryset(obj_queryset)))
+
+    def get_with_counts(self, obj=None, min_count=None, limit=None,
+                        order_by_count=True):
+        """
+        Returns tags annotated with their usage as ``usage_count``.
+
+        :obj: Limits the counted items. Can be a queryset of objects, a model
+          or model instance for its content type or ``None`` to count all
+          items.
+        :min_count: Only returns tags that are used at least that often.
+        :limit: Only returns that many tags.
+        :order_by_count: Orders the tags by their usage, most used first.
+
+        """
+        qs = Tag.objects.with_names(get_language())
+        if isinstance(obj, models.QuerySet):
+            qs = qs.filter(
+                tagged_items__object_id__in=obj.values('pk'),
+                tagged_items__content_type=ctype_models.ContentType.objects.get_for_model(obj.model))  # NOQA
+            qs = qs.annotate(usage_count=models.Count('tagged_items'))
+        elif app_settings.USE_COUNTERS:
+            # read the denormalised counters instead of counting the items
+            if obj is not None:
+                qs = qs.filter(
+                    counts__content_type=ctype_models.ContentType.objects.get_for_model(obj),  # NOQA
+                    counts__count__gt=0)
+            qs = qs.annotate(usage_count=functions.Coalesce(
+                models.Sum('counts__count'), 0))
+        else:
+            if obj is not None:
+                qs = qs.filter(
+                    tagged_items__content_type=ctype_models.ContentType.objects.get_for_model(obj))  # NOQA
+            qs = qs.annotate(usage_count=models.Count('tagged_items'))
+        if min_count:
+            qs = qs.filter(usage_count__gte=min_count)
+        if order_by_count:
+            qs = qs.order_by('-usage_count', 'slug')
+        if limit:
+            qs = qs[:limit]
+        return qs
+
+    def get_tagged_objects(self, obj, slugs, match_all=False):
+        """
+        Returns the objects, that are tagged with the given tags.
+
+        :obj: A model or a queryset of the objects to filter.
+        :slugs: The slugs of the tags.
+        :match_all: If ``True``, only returns objects, that have all of the
+          tags. Otherwise objects need to have at least one of them.
+
+        The filter is applied in the database as a subquery, so the result is
+        a lazy queryset of the given model.
+
+        """
+        if isinstance(obj, models.QuerySet):
+            qs = obj
+        else:
+            qs = obj._default_manager.all()
+        slugs = set(slugs)
+        if not slugs:
+            return qs if match_all else qs.none()
+        items = TaggedItem.objects.filter(
+            content_type=ctype_models.ContentType.objects.get_for_model(qs.model),  # NOQA
+            tag__slug__in=slugs,
+        )
+        if match_all:
+            items = items.order_by().values('object_id').annotate(
+                num_tags=models.Count('tag')).filter(num_tags=len(slugs))
+        return qs.filter(pk__in=items.values('object_id'))
+
+    def get_related(self, tags, obj=None, limit=10):
+        """
+        Returns the tags, that are most often used together with the tags.
+
+        The tags are read from the ``TagCooccurrence`` table and annotated
+        with the number of shared objects as ``cooccurrence_count``.
+
+        :tags: A tag or a list or queryset of tags, e.g. the tags of an
+          object.
+        :obj: Only counts the objects of the content type of this model,
+          instance or queryset.
+        :limit: Only returns that many tags.
+
+        """
+        if isinstance(tags, Tag):
+            tags = [tags]
+        if isinstance(tags, models.QuerySet):
+            tag_ids = tags.values('pk')
+        else:
+            tag_ids = [tag.pk for tag in tags]
+        # one filter call, so that both conditions apply to the same rows
+        pairs = {'reverse_cooccurrences__tag_id__in': tag_ids}
+        if obj is not None:
+            if isinstance(obj, models.QuerySet):
+                obj = obj.model
+            pairs['reverse_cooccurrences__content_type'] = (
+                ctype_models.ContentType.objects.get_for_model(obj))
+        qs = Tag.objects.with_names(get_language()).filter(**pairs).exclude(
+            pk__in=tag_ids).annotate(cooccurrence_count=models.Sum(
+                'reverse_cooccurrences__count')).order_by(
+            '-cooccurrence_count', 'slug')
+        return qs[:limit] if limit else qs
+
+    def merge(self, sources, target):
+        """
+        Merges the source tags into the target tag and deletes them.
+
+        The tagged items are moved with one UPDATE. Items, that would tag an
+        object twice, are deleted before in one statement. Translations of the
+        sources are moved to the target for the languages it lacks, the first
+        source wins.
+
+        """
+        # the signal handlers need the models
+        from . import signals
+
+        source_ids = [tag.pk for tag in sources if tag.pk != target.pk]
+        if not source_ids:
+            return target
+        tag_ids = source_ids + [target.pk]
+
+        instrumented = metrics.instrument('tags.merge', tags=len(tag_ids))
+        with instrumented as counts, transaction.atomic():
+            # keeps the target's item or the oldest item for each object
+            duplicates = TaggedItem.objects.filter(
+                models.Q(tag_id=target.pk) | models.Q(pk__lt=OuterRef('pk')),
+                tag_id__in=tag_ids,
+                content_type=OuterRef('content_type'),
+                object_id=OuterRef('object_id'),
+            )
+            conflicts = TaggedItem.objects.filter(
+                tag_id__in=source_ids).annotate(
+                is_duplicate=models.Exists(duplicates)).filter(
+                is_duplicate=True)
+            items = TaggedItem.objects.filter(tag_id__in=source_ids)
+            if app_settings.CACHE_ENABLED:
+                object_ids = defaultdict(list)
+                for content_type_id, object_id in items.values_list(
+                        'content_type_id', 'object_id').iterator():
+                    object_ids[content_type_id].append(object_id)
+                for content_type_id, ids in object_ids.items():
+                    cache.invalidate_objs(content_type_id, ids)
+            with signals.counters_muted():
+                counts['items_deleted'] = TaggedItem.objects.filter(
+                    pk__in=conflicts.values('pk')).delete()[0]
+            counts['items_moved'] = items.update(tag=target)
+
+            languages = set(target.translations.values_list(
+                'language_code', flat=True))
+            moved = {}
+            translations = TagTranslation.objects.filter(
+                master_id__in=source_ids).values_list(
+                'pk', 'master_id', 'language_code')
+            for pk, master_id, language_code in sorted(
+                    translations, key=lambda t: source_ids.index(t[1])):
+                if language_code not in languages:
+                    languages.add(language_code)
+                    moved[pk] = language_code
+            TagTranslation.objects.filter(pk__in=moved.keys()).update(
+                master=target)
+
+            self.filter(pk__in=source_ids).delete()
+            if app_settings.USE_COUNTERS:
+                TagCount.objects.rebuild(tag_ids=[target.pk])
+            if app_settings.USE_COOCCURRENCES:
+                TagCooccurrence.objects.rebuild(tag_ids=[target.pk])
+        cache.invalidate_tags(tag_ids)
+        cache.invalidate_translations(
+            (target.pk, language_code) for language_code in moved.values())
+        # drops translations cached on the instance
+        target._translations_cache.clear()
+        return target
+
+    def rename(self, tag, name, language=None):
+        """
+        Renames a tag in the given or active language and updates its slug.
+
+        If another tag already uses the new slug, the tag is merged into that
+        one, which is returned instead.
+
+        """
+        language = language or get_parler_language()
+        slug = get_slug(name)
+        existing = self.filter(slug=slug).exclude(pk=tag.pk).first()
+        if existing is not None:
+            return self.merge([tag], existing)
+        with metrics.instrument('tags.rename'), transaction.atomic():
+            tag.slug = slug
+            tag.set_current_language(language)
+            tag.name = name
+            tag.save()
+        return tag
+
+    def prune(self, batch_size=1000):
+        """Deletes all tags without tagged items in batches."""
+        unused = self.filter(tagged_items__isnull=True)
+        with metrics.instrument('tags.prune', tags_deleted=0) as counts:
+            while True:
+                tag_ids = list(
+                    unused.values_list('pk', flat=True)[:batch_size])
+                if not tag_ids:
+                    return counts['tags_deleted']
+                with transaction.atomic():
+                    # a tag could have been used since the select
+                    counts['tags_deleted'] += unused.filter(
+                        pk__in=tag_ids).delete()[1].get(Tag._meta.label, 0)
+
+    def _find(self, names, language):
+        """
+        Looks up the existing tags for the names with one query.
+
+        Returns a ``{(normalised name, slug): (name, tag)}`` dictionary of the
+        unique names, whose tag is ``None`` for unknown names.
+
+        """
+        found = {}
+        for name in names:
+            found.setdefault((normalize_name(name), get_slug(name)), name)
+        if not found:
+            return found
+
+        translations = TagTranslation.objects.filter(language_code=language)
+        matching = translations.filter(normalized_name__in=set(
+            normalized for normalized, slug in found))
+        by_slug = models.Q(slug__in=set(slug for _, slug in found))
+        by_name = models.Q(pk__in=matching.values('master_id'))
+        name_match = models.Subquery(translations.filter(
+            master=OuterRef('pk')).values('normalized_name')[:1])
+        tags_by_name, tags_by_slug = {}, {}
+        for tag in self.filter(by_slug | by_name).annotate(
+                normalized_name_match=name_match):
+            tags_by_slug[tag.slug] = tag
+            if tag.normalized_name_match:
+                tags_by_name.setdefault(tag.normalized_name_match, tag)
+        for (normalized, slug), name in found.items():
+            found[normalized, slug] = (name, tags_by_name.get(
+                normalized, tags_by_slug.get(slug)))
+        return found
+
+    def get_many(self, names, language=None):
+        """
+        Returns the existing tags for a list of tag names or slugs.
+
+        The names are matched like by ``get_or_create_many``, but unknown
+        names are skipped. Names resolving to the same tag only return it
+        once.
+
+        """
+        found = self._find(names, language or get_parler_language())
+        return list({tag.pk: tag for name, tag in found.values()
+                     if tag is not None}.values())
+
+    def get_or_create_many(self, names, language=None):
+        """
+        Returns the tags for a list of tag names, creating missing ones.
+
+        A name is mapped to the tag with a translation of the same normalised
+        name in the language or else to the tag with its slug. All existing
+        tags are fetched with one query. The missing tags and their
+        translations are inserted in bulk ignoring conflicts, so that
+        concurrent calls creating the same tags do not fail but share them.
+        Names resolving to the same tag only return it once.
+
+        """
+        language = language or get_parler_language()
+        names = list(names)
+        if not names:
+            return []
+
+        instrumented = metrics.instrument(
+            'tags.get_or_create_many', tags=0, tags_created=0)
+        with instrumented as counts:
+            found = self._find(names, language)
+            counts['tags'] = len(found)
+            missing, created = {}, {}
+            for (normalized, slug), (name, tag) in found.items():
+                if tag is None:
+                    missing.setdefault(slug, name)
+            if missing:
+                self.bulk_create([Tag(slug=slug) for slug in missing],
+                                 ignore_conflicts=True)
+                # not every backend returns the primary keys from bulk_create
+                # and some tags may have been created by a concurrent call
+                created = {tag.slug: tag for tag in self.filter(
+                    slug__in=missing.keys())}
+                TagTranslation.objects.bulk_create([
+                    TagTranslation(
+                        master=tag,
+                        language_code=language,
+                        name=missing[slug],
+                        normalized_name=normalize_name(missing[slug]),
+                    ) for slug, tag in created.items()], ignore_conflicts=True)
+                counts['tags_created'] = len(created)
+        tags = (tag or created[slug]
+                for (normalized, slug), (name, tag) in found.items())
+        return list({tag.pk: tag for tag in tags}.values())
 
 
 class Tag(TranslatableModel):
@@ -45,6 +504,8 @@ class Tag(TranslatableModel):
 
     translated:
     :name: A translatable name of the tag.
+    :normalized_name: The name as returned by ``normalize_name``. It is set
+      when the translation is saved.
 
     """
 
@@ -52,6 +513,7 @@ class Tag(TranslatableModel):
         verbose_name=_('Slug'),
         max_length=64,
         unique=True,
+        allow_unicode=True,
     )
 
     translations = TranslatedFields(
@@ -59,13 +521,59 @@ class Tag(TranslatableModel):
             verbose_name=_('Name'),
             max_length=64,
         ),
+        normalized_name=models.CharField(
+            verbose_name=_('Normalized name'),
+            max_length=255,
+            editable=False,
+            default='',
+        ),
+        meta={'indexes': [
+            # exact name lookups in one language
+            models.Index(fields=['language_code', 'name'],
+                         name='multilingual_tagtrans_name'),
+            # lookups and prefix matches of normalised names, the operator
+            # class allows LIKE prefix scans on PostgreSQL
+            models.Index(fields=['language_code', 'normalized_name'],
+                         name='multilingual_tagtrans_norm',
+                         opclasses=['varchar_pattern_ops',
+                                    'varchar_pattern_ops']),
+        ]},
     )
 
     objects = TagManager()
 
     def __str__(self):
+        # annotated by ``TagQuerySet.with_names``
+        display_name = getattr(self, 'display_name', None)
+        if display_name is not None:
+            return display_name
         return self.safe_translation_getter('name', self.slug)
 
+    def delete(self, *args, **kwargs):
+        # like ``TagQuerySet.delete``
+        from . import signals
+
+        with signals.counters_muted():
+            return super(Tag, self).delete(*args, **kwargs)
+
+
+TagTranslation = Tag._parler_meta.root_model
+
+
+class TaggedItemQuerySet(models.QuerySet):
+    """QuerySet for the `TaggedItem` model."""
+    def with_objects(self):
+        """
+        Resolves the tagged objects of all items in bulk.
+
+        The objects are fetched with one query per content type and stored in
+        the cache of the ``object`` field. The tags and their translations are
+        fetched along with the items.
+
+        """
+        return self.select_related('tag', 'content_type').prefetch_related(
+            'object', 'tag__translations')
+
 
 class TaggedItem(models.Model):
     """
@@ -76,17 +584,21 @@ class TaggedItem(models.Model):
 
     """
 
+    # both foreign keys lead the composite indexes below, so that their own
+    # indexes would only slow down the writes
     tag = models.ForeignKey(
         Tag,
         verbose_name=_('Tag'),
         related_name='tagged_items',
         on_delete=models.CASCADE,
+        db_index=False,
     )
 
     content_type = models.ForeignKey(
         ctype_models.ContentType,
         related_name='tagged_items',
         on_delete=models.CASCADE,
+        db_index=False,
     )
     object_id = models.PositiveIntegerField()
     object = fields.GenericForeignKey('content_type', 'object_id')
@@ -99,8 +611,261 @@ class TaggedItem(models.Model):
         on_delete=models.SET_NULL,
     )
 
+    objects = TaggedItemQuerySet.as_manager()
+
     def __str__(self):
         return u'{0}: #{1}'.format(self.object, self.tag)
 
     class Meta:
+        # the unique constraint also serves the lookups per object
         unique_together = ('content_type', 'object_id', 'tag')
+        indexes = [
+            # the objects of a content type with a certain tag
+            models.Index(fields=['tag', 'content_type', 'object_id'],
+                         name='multilingual_ti_tag_ctype'),
+            # the tags used by a content type
+            models.Index(fields=['content_type', 'tag'],
+                         name='multilingual_ti_ctype_tag'),
+        ]
+
+
+class TagCountManager(models.Manager):
+    """Manager for the `TagCount` model."""
+    def update_counts(self, content_type_id, tag_ids, delta):
+        """
+        Adds ``delta`` to the counters of the given tags and content type.
+
+        Missing counters are created first, so that concurrent updates of a
+        new counter cannot get lost. Counters never drop below zero.
+
+        """
+        tag_ids = list(tag_ids)
+        if not tag_ids or not delta:
+            return
+        if delta > 0:
+            self.bulk_create([
+                TagCount(tag_id=tag_id, content_type_id=content_type_id)
+                for tag_id in tag_ids], ignore_conflicts=True)
+        self.filter(
+            tag_id__in=tag_ids, content_type_id=content_type_id).update(
+            count=functions.Greatest(models.F('count') + delta, 0))
+
+    def rebuild(self, batch_size=1000, tag_ids=None):
+        """
+        Recreates the counters from the existing `TaggedItem` rows.
+
+        :tag_ids: Only recreates the counters of these tags.
+
+        """
+        counters = self.all()
+        items = TaggedItem.objects.order_by()
+        if tag_ids is not None:
+            counters = counters.filter(tag_id__in=tag_ids)
+            items = items.filter(tag_id__in=tag_ids)
+        usage = items.values('tag_id', 'content_type_id').annotate(
+            count=models.Count('pk')).values_list(
+            'tag_id', 'content_type_id', 'count')
+        with transaction.atomic():
+            counters.delete()
+            batch = []
+            for tag_id, content_type_id, count in usage.iterator():
+                batch.append(TagCount(
+                    tag_id=tag_id,
+                    content_type_id=content_type_id,
+                    count=count,
+                ))
+                if len(batch) >= batch_size:
+                    self.bulk_create(batch)
+                    batch = []
+            self.bulk_create(batch)
+
+
+class TagCount(models.Model):
+    """
+    Denormalised number of `TaggedItem` rows of a tag and content type.
+
+    Only maintained if ``MULTILINGUAL_TAGS_USE_COUNTERS`` is enabled.
+
+    :tag: FK to the counted `Tag`.
+    :content_type: FK to the content type of the counted items.
+    :count: The number of items.
+
+    """
+
+    tag = models.ForeignKey(
+        Tag,
+        verbose_name=_('Tag'),
+        related_name='counts',
+        on_delete=models.CASCADE,
+    )
+
+    content_type = models.ForeignKey(
+        ctype_models.ContentType,
+        related_name='tag_counts',
+        on_delete=models.CASCADE,
+    )
+
+    count = models.PositiveIntegerField(
+        verbose_name=_('Count'),
+        default=0,
+    )
+
+    objects = TagCountManager()
+
+    def __str__(self):
+        return u'{0} ({1}): {2}'.format(self.tag, self.content_type,
+                                        self.count)
+
+    class Meta:
+        unique_together = ('tag', 'content_type')
+        indexes = [
+            models.Index(fields=['content_type', '-count'],
+                         name='multilingual_tagcount_popular'),
+        ]
+
+
+class TagCooccurrenceManager(models.Manager):
+    """Manager for the `TagCooccurrence` model."""
+    def update_for_object(self, content_type_id, old_tag_ids, new_tag_ids):
+        """
+        Updates the co-occurrences after the tags of an object changed.
+
+        :old_tag_ids: The ids of the tags the object had before.
+        :new_tag_ids: The ids of the tags the object has now.
+
+        The number of queries does not depend on the number of tags.
+
+        """
+        old_tag_ids, new_tag_ids = set(old_tag_ids), set(new_tag_ids)
+        added_ids = new_tag_ids - old_tag_ids
+        removed_ids = old_tag_ids - new_tag_ids
+        if added_ids and len(new_tag_ids) > 1:
+            self.bulk_create([
+                TagCooccurrence(tag_id=tag_id, related_tag_id=related_id,
+                                content_type_id=content_type_id)
+                for tag_id in added_ids for related_id in new_tag_ids
+                if tag_id != related_id
+            ] + [
+                TagCooccurrence(tag_id=tag_id, related_tag_id=related_id,
+                                content_type_id=content_type_id)
+                for tag_id in new_tag_ids - added_ids
+                for related_id in added_ids
+            ], ignore_conflicts=True)
+            self._update_pairs(content_type_id, added_ids, new_tag_ids, 1)
+        if removed_ids and len(old_tag_ids) > 1:
+            self._update_pairs(content_type_id, removed_ids, old_tag_ids, -1)
+            self.filter(
+                models.Q(tag_id__in=removed_ids) | models.Q(
+                    related_tag_id__in=removed_ids),
+                content_type_id=content_type_id, count=0).delete()
+
+    def _update_pairs(self, content_type_id, changed_ids, tag_ids, delta):
+        """Adds ``delta`` to all pairs of tags with a changed tag."""
+        pairs = self.filter(content_type_id=content_type_id)
+        count = functions.Greatest(models.F('count') + delta, 0)
+        pairs.filter(tag_id__in=changed_ids,
+                     related_tag_id__in=tag_ids).update(count=count)
+        pairs.filter(tag_id__in=tag_ids - changed_ids,
+                     related_tag_id__in=changed_ids).update(count=count)
+
+    def rebuild(self, batch_size=1000, tag_ids=None):
+        """
+        Recreates the co-occurrences from the existing `TaggedItem` rows.
+
+        The pairs are counted with one self join of the tagged items.
+
+        :tag_ids: Only recreates the pairs, that contain one of these tags.
+
+        """
+        pairs = self.all()
+        # joins the items of the same object through their content type, all
+        # conditions on the joined items need to be given in one filter call
+        conditions = [
+            models.Q(content_type__tagged_items__object_id=models.F(
+                'object_id')),
+            models.Q(content_type__tagged_items__tag_id__gt=models.F(
+                'tag_id')),
+        ]
+        if tag_ids is not None:
+            tag_ids = list(tag_ids)
+            pairs = pairs.filter(models.Q(tag_id__in=tag_ids) | models.Q(
+                related_tag_id__in=tag_ids))
+            conditions.append(models.Q(tag_id__in=tag_ids) | models.Q(
+                content_type__tagged_items__tag_id__in=tag_ids))
+        items = TaggedItem.objects.order_by().filter(*conditions)
+        usage = items.values(
+            'tag_id', 'content_type__tagged_items__tag_id',
+            'content_type_id').annotate(
+            count=models.Count('pk')).values_list(
+            'tag_id', 'content_type__tagged_items__tag_id',
+            'content_type_id', 'count')
+        with transaction.atomic():
+            pairs.delete()
+            batch = []
+            for tag_id, related_id, content_type_id, count in usage.iterator():
+                batch.extend([
+                    TagCooccurrence(
+                        tag_id=tag_id, related_tag_id=related_id,
+                        content_type_id=content_type_id, count=count),
+                    TagCooccurrence(
+                        tag_id=related_id, related_tag_id=tag_id,
+                        content_type_id=content_type_id, count=count),
+                ])
+                if len(batch) >= batch_size:
+                    self.bulk_create(batch)
+                    batch = []
+            self.bulk_create(batch)
+
+
+class TagCooccurrence(models.Model):
+    """
+    Denormalised number of objects of a content type, that have both tags.
+
+    Every pair is stored in both directions, so that the related tags of a
+    tag can be read from one index. Only maintained if
+    ``MULTILINGUAL_TAGS_USE_COOCCURRENCES`` is enabled.
+
+    :tag: FK to the `Tag`, whose related tags are counted.
+    :related_tag: FK to the `Tag`, that is used together with ``tag``.
+    :content_type: FK to the content type of the counted objects.
+    :count: The number of objects.
+
+    """
+
+    tag = models.ForeignKey(
+        Tag,
+        verbose_name=_('Tag'),
+        related_name='cooccurrences',
+        on_delete=models.CASCADE,
+    )
+
+    related_tag = models.ForeignKey(
+        Tag,
+        verbose_name=_('Related tag'),
+        related_name='reverse_cooccurrences',
+        on_delete=models.CASCADE,
+    )
+
+    content_type = models.ForeignKey(
+        ctype_models.ContentType,
+        related_name='tag_cooccurrences',
+        on_delete=models.CASCADE,
+    )
+
+    count = models.PositiveIntegerField(
+        verbose_name=_('Count'),
+        default=0,
+    )
+
+    objects = TagCooccurrenceManager()
+
+    def __str__(self):
+        return u'{0} + {1} ({2}): {3}'.format(
+            self.tag, self.related_tag, self.content_type, self.count)
+
+    class Meta:
+        unique_together = ('tag', 'related_tag', 'content_type')
+        indexes = [
+            models.Index(fields=['tag', 'content_type', '-count'],
+                         name='multilingual_tagcooc_top'),
+        ]
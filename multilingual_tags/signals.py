@@ -0,0 +1,165 @@
+"""
+Signal handlers of the ``multilingual_tags`` app.
+
+The handlers keeping the cache, the counters and the co-occurrences in sync
+are only connected by ``connect_receivers`` if one of them is used. Without
+receivers Django deletes the tagged items of a deleted tag or object with a
+single query instead of loading them first.
+
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import app_settings, cache, models
+
+
+_local = threading.local()
+
+
+@contextmanager
+def counters_muted():
+    """
+    Disables the per row counter and co-occurrence updates of the handlers
+    below.
+
+    Used by the bulk write paths, which update both themselves.
+
+    """
+    muted = getattr(_local, 'counters_muted', False)
+    _local.counters_muted = True
+    try:
+        yield
+    finally:
+        _local.counters_muted = muted
+
+
+def _update_counters():
+    if not app_settings.USE_COUNTERS:
+        return False
+    return not getattr(_local, 'counters_muted', False)
+
+
+def _update_cooccurrences():
+    if not app_settings.USE_COOCCURRENCES:
+        return False
+    return not getattr(_local, 'counters_muted', False)
+
+
+def _get_other_tag_ids(instance, content_type_id, object_id):
+    """Returns the ids of the other tags of the item's object."""
+    return set(models.TaggedItem.objects.filter(
+        content_type_id=content_type_id, object_id=object_id,
+    ).exclude(pk=instance.pk).values_list('tag_id', flat=True))
+
+
+def taggeditem_pre_save(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    update_counters = _update_counters()
+    update_cooccurrences = _update_cooccurrences()
+    if not update_counters and not update_cooccurrences:
+        return
+    old = sender.objects.filter(pk=instance.pk).values(
+        'tag_id', 'content_type_id', 'object_id').first()
+    if not old:
+        return
+    if update_counters and (old['tag_id'], old['content_type_id']) != (
+            instance.tag_id, instance.content_type_id):
+        models.TagCount.objects.update_counts(
+            old['content_type_id'], [old['tag_id']], -1)
+        instance._tag_count_changed = True
+    if update_cooccurrences and (
+            old['tag_id'], old['content_type_id'], old['object_id']) != (
+            instance.tag_id, instance.content_type_id, instance.object_id):
+        other_ids = _get_other_tag_ids(
+            instance, old['content_type_id'], old['object_id'])
+        models.TagCooccurrence.objects.update_for_object(
+            old['content_type_id'], other_ids | {old['tag_id']}, other_ids)
+        instance._cooccurrences_changed = True
+
+
+def taggeditem_post_save(sender, instance, created, raw=False, **kwargs):
+    cache.invalidate_obj(instance.content_type_id, instance.object_id)
+    if raw:
+        return
+    if _update_counters() and (
+            created or getattr(instance, '_tag_count_changed', False)):
+        instance._tag_count_changed = False
+        models.TagCount.objects.update_counts(
+            instance.content_type_id, [instance.tag_id], 1)
+    if _update_cooccurrences() and (
+            created or getattr(instance, '_cooccurrences_changed', False)):
+        instance._cooccurrences_changed = False
+        other_ids = _get_other_tag_ids(
+            instance, instance.content_type_id, instance.object_id)
+        models.TagCooccurrence.objects.update_for_object(
+            instance.content_type_id, other_ids,
+            other_ids | {instance.tag_id})
+
+
+def taggeditem_post_delete(sender, instance, **kwargs):
+    cache.invalidate_obj(instance.content_type_id, instance.object_id)
+    if _update_counters():
+        models.TagCount.objects.update_counts(
+            instance.content_type_id, [instance.tag_id], -1)
+    if _update_cooccurrences():
+        other_ids = _get_other_tag_ids(
+            instance, instance.content_type_id, instance.object_id)
+        models.TagCooccurrence.objects.update_for_object(
+            instance.content_type_id, other_ids | {instance.tag_id},
+            other_ids)
+
+
+def tag_changed(sender, instance, **kwargs):
+    cache.invalidate_tag(instance.pk)
+
+
+@receiver(pre_save, sender=models.TagTranslation)
+def tagtranslation_pre_save(sender, instance, **kwargs):
+    instance.normalized_name = models.normalize_name(instance.name)
+
+
+def tagtranslation_changed(sender, instance, **kwargs):
+    cache.invalidate_tag(instance.master_id)
+
+
+RECEIVERS = [
+    (pre_save, models.TaggedItem, taggeditem_pre_save),
+    (post_save, models.TaggedItem, taggeditem_post_save),
+    (post_delete, models.TaggedItem, taggeditem_post_delete),
+    (post_save, models.Tag, tag_changed),
+    (post_delete, models.Tag, tag_changed),
+    (post_save, models.TagTranslation, tagtranslation_changed),
+    (post_delete, models.TagTranslation, tagtranslation_changed),
+]
+
+
+def receivers_needed():
+    """
+    Returns if the cache, the counters, the co-occurrences or the request
+    memo of ``middleware.TagMemoMiddleware`` are used.
+
+    """
+    return any([
+        app_settings.CACHE_ENABLED,
+        app_settings.USE_COUNTERS,
+        app_settings.USE_COOCCURRENCES,
+        'multilingual_tags.middleware.TagMemoMiddleware' in (
+            getattr(settings, 'MIDDLEWARE', None) or ()),
+    ])
+
+
+def connect_receivers():
+    """Connects the handlers above, called by the app config if needed."""
+    for signal, sender, handler in RECEIVERS:
+        signal.connect(handler, sender=sender)
+
+
+def disconnect_receivers():
+    """Disconnects the handlers connected by ``connect_receivers``."""
+    for signal, sender, handler in RECEIVERS:
+        signal.disconnect(handler, sender=sender)
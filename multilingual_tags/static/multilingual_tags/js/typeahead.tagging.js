@@ -10,7 +10,7 @@
  * - prevent umlauts from being cleaned out
  * - implement option dict and different actions
  *   Options:
- *   - tagsource: array
+ *   - tagsource: array or data-tags-url attribute
  *   - typeahead: boolean
  *   - tag_limit: integer
  *   Actions:
@@ -20,8 +20,6 @@
  *
  * Feature wishlist:
  * - make it work without typeahead as standalone tagging plugin
- * - add a data-tags-url so that it is possible to initialize the plugin only via data attributes.
- *   the view must then return the list of tags
  * - add listener for when the input is updated, so that it is reflected in the tag input
  * - make the new tag input expand automatically when typing
  *
@@ -67,6 +65,8 @@ function TypeaheadTaggingPlugin(element) {
     this.cleaning_pattern = /[^\w\s-]+/g;                               // The regex pattern to clean tags with.
     this.typeahead_datasetname = 'tagging';                             // The name of the typeahead dataset.
     this.max_tags = parseInt(this.element.getAttribute('data-max-tags')) || 9001; // get the maximum tag count from the element or set it to over 9000
+    this.tags_url = this.element.getAttribute('data-tags-url');          // the url, that returns the matching tags as {"tags": [...]}
+    this.remote_delay = 150;                                            // milliseconds to wait for more input before requesting the tags_url
 
 }
 
@@ -393,9 +393,15 @@ TypeaheadTaggingPlugin.prototype.init = function (tagsource) {
 TypeaheadTaggingPlugin.prototype.init_typeahead = function (tagsource) {
 
     // initialize typeahead for the input
-    if (tagsource) {
+    var source; // the function, that looks up the matching tags
 
+    if (tagsource) {
+        source = this.substringMatcher(tagsource);
+    } else if (this.tags_url) {
+        source = this.remoteMatcher(this.tags_url);
+    }
 
+    if (source) {
         jQuery(this.input).typeahead(
             {
                 hint     : true,
@@ -405,12 +411,40 @@ TypeaheadTaggingPlugin.prototype.init_typeahead = function (tagsource) {
             {
                 name      : this.typeahead_datasetname,
                 displayKey: 'value',
-                source    : this.substringMatcher(tagsource)
+                source    : source
             }
         );
     }
 };
 
+TypeaheadTaggingPlugin.prototype.remoteMatcher = function (url) {
+
+    // fetches the matching tags from the url instead of a static tagsource
+    var that = this,
+        timeout,    // the timeout, that delays the request while the user is typing
+        request;    // the currently running request
+
+    return function findMatches(q, cb) {
+        window.clearTimeout(timeout);
+        timeout = window.setTimeout(function () {
+            if (request) {
+                request.abort();
+            }
+            request = jQuery.getJSON(url, {q: q}, function (data) {
+                var matches = [],
+                    taglist = that.get_taglist();
+
+                jQuery.each(data.tags, function (i, str) {
+                    if (taglist.indexOf(str) === -1) {
+                        matches.push({value: str});
+                    }
+                });
+                cb(matches);
+            });
+        }, that.remote_delay);
+    };
+};
+
 TypeaheadTaggingPlugin.prototype.set_taglist = function (taglist) {
 
     // saves an array of tag strings as value on the original input
@@ -471,18 +505,24 @@ TypeaheadTaggingPlugin.prototype.substringMatcher = function (tagsource) {
 (function ($) {
     $.fn.tagging = function (arg, arg2) {
         var plugin,     // the plugin instance
-            plugin_name = 'plugin_tagging';
+            plugin_name = 'plugin_tagging',
+            init_plugins;
+
+        init_plugins = function (elements, tagsource) {
+            return elements.each(function () {
+                plugin = $.data(this, plugin_name);
+                if (typeof plugin === 'undefined') {
+                    plugin = new TypeaheadTaggingPlugin(this);
+                    $.data(this, plugin_name, plugin);
+                    plugin.init(tagsource);
+                }
+                return plugin;
+            });
+        };
+
         if (arg) {
             if ($.isArray(arg)) {
-                return this.each(function () {
-                    plugin = $.data(this, plugin_name);
-                    if (typeof plugin === 'undefined') {
-                        plugin = new TypeaheadTaggingPlugin(this);
-                        $.data(this, plugin_name, plugin);
-                        plugin.init(arg);
-                    }
-                    return plugin;
-                });
+                return init_plugins(this, arg);
             } else if (arg === 'clear') {
                 plugin = $.data(this[0], plugin_name);
                 return plugin.clear_tags();
@@ -496,7 +536,12 @@ TypeaheadTaggingPlugin.prototype.substringMatcher = function (tagsource) {
             }
         } else {
             // if the plugin is called without tag source, return the plugins itself
-            return $.data(this[0], plugin_name);
+            plugin = this.length ? $.data(this[0], plugin_name) : undefined;
+            if (typeof plugin === 'undefined' && this.filter('[data-tags-url]').length) {
+                // the tags are fetched from the data-tags-url of the elements
+                return init_plugins(this.filter('[data-tags-url]'));
+            }
+            return plugin;
         }
     };
 })(jQuery);
@@ -0,0 +1,170 @@
+"""Tests for the admin classes of the ``multilingual_tags`` app."""
+from unittest.mock import patch
+
+from django.contrib.admin import AdminSite
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from mixer.backend.django import mixer
+
+from .. import admin, app_settings
+from ..models import Tag, TaggedItem
+from .test_app.models import DummyModel
+
+
+class TaggedItemAdminTestCase(TestCase):
+    """Tests for the ``TaggedItemAdmin`` admin class."""
+    longMessage = True
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'test')
+        self.client.force_login(self.admin)
+
+    def add_items(self, count):
+        for i in range(0, count):
+            mixer.blend(
+                'multilingual_tags.TaggedItem',
+                tag=mixer.blend('multilingual_tags.TagTranslation',
+                                language_code='en').master,
+                content_type=ContentType.objects.get_for_model(DummyModel),
+                object_id=mixer.blend('test_app.DummyModel').pk)
+
+    def get_num_queries(self):
+        url = reverse('admin:multilingual_tags_taggeditem_changelist')
+        with CaptureQueriesContext(connection) as context:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist(self):
+        self.add_items(2)
+        num_queries = self.get_num_queries()
+        self.add_items(5)
+        self.assertEqual(self.get_num_queries(), num_queries, msg=(
+            'The number of queries should not depend on the items.'))
+
+
+class TaggedItemInlineTestCase(TestCase):
+    """Tests for the ``TaggedItemInline`` of the test app's admin."""
+    longMessage = True
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'test')
+        self.client.force_login(self.admin)
+        self.dummy = mixer.blend('test_app.DummyModel', user=self.admin)
+        self.tags = mixer.cycle(2).blend('multilingual_tags.Tag')
+        self.item = TaggedItem.objects.create(
+            tag=self.tags[0], object_id=self.dummy.pk,
+            content_type=ContentType.objects.get_for_model(DummyModel))
+        self.url = reverse(
+            'admin:test_app_dummymodel_change', args=[self.dummy.pk])
+        self.prefix = 'multilingual_tags-taggeditem-content_type-object_id'
+
+    def post(self, rows):
+        data = {
+            'charfield': 'dummy',
+            'user': self.admin.pk,
+            self.prefix + '-TOTAL_FORMS': len(rows),
+            self.prefix + '-INITIAL_FORMS': 1,
+            self.prefix + '-MIN_NUM_FORMS': 0,
+            self.prefix + '-MAX_NUM_FORMS': 1000,
+        }
+        for i, row in enumerate(rows):
+            data.update(('{0}-{1}-{2}'.format(self.prefix, i, key), value)
+                        for key, value in row.items())
+        return self.client.post(self.url, data)
+
+    def test_inline(self):
+        resp = self.client.get(self.url)
+        self.assertContains(resp, 'vForeignKeyRawIdAdminField', msg_prefix=(
+            'Should render the tag as a raw id field.'))
+        self.assertContains(resp, str(self.tags[0]), msg_prefix=(
+            'Should render the label of the selected tag.'))
+
+        resp = self.post([
+            {'id': self.item.pk, 'tag': self.tags[0].pk},
+            {'tag': self.tags[0].pk},
+        ])
+        self.assertContains(resp, 'A Tag may only exist once per object.')
+
+        resp = self.post([
+            {'id': self.item.pk, 'tag': self.tags[0].pk, 'DELETE': 'on'},
+            {'tag': self.tags[0].pk},
+            {'tag': self.tags[1].pk, 'user': self.admin.pk},
+        ])
+        self.assertEqual(resp.status_code, 302, msg=(
+            'Should ignore deleted rows when checking for duplicates.'))
+        self.assertEqual(
+            sorted(self.dummy.tags.values_list('tag', 'user')),
+            [(self.tags[0].pk, None), (self.tags[1].pk, self.admin.pk)])
+
+    def test_concurrent_insert(self):
+        # another editor adds the tag after the page was rendered
+        TaggedItem.objects.create(
+            tag=self.tags[1], object_id=self.dummy.pk,
+            content_type=ContentType.objects.get_for_model(DummyModel))
+        resp = self.post([
+            {'id': self.item.pk, 'tag': self.tags[0].pk},
+            {'tag': self.tags[1].pk},
+        ])
+        self.assertContains(
+            resp, 'A Tag may only exist once per object.', msg_prefix=(
+                'Should check the stored items instead of failing on'
+                ' insert.'))
+
+
+class TagAdminTestCase(TestCase):
+    """Tests for the ``TagAdmin`` admin class."""
+    longMessage = True
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'test')
+        self.client.force_login(self.admin)
+        self.tags = mixer.cycle(3).blend('multilingual_tags.Tag')
+        mixer.blend(
+            'multilingual_tags.TaggedItem', tag=self.tags[2],
+            content_type=ContentType.objects.get_for_model(DummyModel),
+            object_id=mixer.blend('test_app.DummyModel').pk)
+
+    def test_merge_tags(self):
+        url = reverse('admin:multilingual_tags_tag_changelist')
+        resp = self.client.post(url, {
+            'action': 'merge_tags',
+            '_selected_action': [tag.pk for tag in self.tags[:1]],
+        })
+        self.assertEqual(Tag.objects.count(), 3, msg=(
+            'Should not merge a single tag.'))
+        resp = self.client.post(url, {
+            'action': 'merge_tags',
+            '_selected_action': [tag.pk for tag in self.tags],
+        })
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(list(Tag.objects.all()), [self.tags[2]], msg=(
+            'Should merge the tags into the most used one.'))
+        self.assertEqual(TaggedItem.objects.get().tag, self.tags[2])
+
+
+class RegisterModelsTestCase(TestCase):
+    """Tests for the ``register_models`` function."""
+    longMessage = True
+
+    def test_register_models(self):
+        site = AdminSite()
+        admin.register_models(site)
+        self.assertIsInstance(site._registry[Tag], admin.TagAdmin, msg=(
+            'Should register both models by default.'))
+        self.assertIsInstance(
+            site._registry[TaggedItem], admin.TaggedItemAdmin)
+
+        site = AdminSite()
+        with patch.object(app_settings, 'REGISTER_ADMIN', ['Tag']):
+            admin.register_models(site)
+        self.assertEqual(list(site._registry), [Tag], msg=(
+            'Should only register the configured models.'))
@@ -0,0 +1,79 @@
+"""Tests for the async API of the ``multilingual_tags`` app."""
+import asyncio
+import threading
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import TransactionTestCase
+from django.utils import translation
+
+from mixer.backend.django import mixer
+
+from .. import utils
+from ..async_utils import run_in_thread
+from ..models import Tag, TaggedItem
+from .test_app.models import DummyModel
+
+
+class RunInThreadTestCase(TransactionTestCase):
+    """Tests for the ``run_in_thread`` helper."""
+    longMessage = True
+
+    def test_run_in_thread(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        async def run_both():
+            return await asyncio.gather(
+                run_in_thread(barrier.wait), run_in_thread(barrier.wait))
+        # the barrier would time out, if the calls waited for each other
+        self.assertEqual(sorted(asyncio.run(run_both())), [0, 1], msg=(
+            'Should run concurrent calls in parallel.'))
+
+    def test_language(self):
+        with translation.override('de'):
+            language = asyncio.run(run_in_thread(translation.get_language))
+        self.assertEqual(language, 'de', msg=(
+            'Should activate the language of the caller in the thread.'))
+
+
+class AsyncAPITestCase(TransactionTestCase):
+    """Tests for the async methods of the manager and the utilities."""
+    longMessage = True
+
+    def setUp(self):
+        self.dummy = mixer.blend('test_app.DummyModel')
+        self.tag = mixer.blend('multilingual_tags.TagTranslation',
+                               language_code='en').master
+        TaggedItem.objects.create(
+            tag=self.tag, object_id=self.dummy.pk,
+            content_type=ContentType.objects.get_for_model(DummyModel))
+
+    def test_manager(self):
+        self.assertEqual(
+            asyncio.run(Tag.objects.aget_for_obj(self.dummy)), [self.tag])
+        self.assertEqual(
+            asyncio.run(Tag.objects.aget_for_model(DummyModel)), [self.tag])
+        self.assertEqual(
+            asyncio.run(Tag.objects.aget_for_queryset(
+                DummyModel.objects.all())), [self.tag])
+
+    def test_manager_language(self):
+        self.tag.translations.create(language_code='de', name='Deutsch')
+        with translation.override('de'):
+            tags = asyncio.run(Tag.objects.aget_for_obj(self.dummy))
+        self.assertEqual([str(tag) for tag in tags], ['Deutsch'], msg=(
+            'Should return the names in the active language.'))
+
+    def test_utils(self):
+        result = asyncio.run(utils.atag_objects([self.dummy], ['new']))
+        self.assertEqual(result['items_added'], 1, msg=(
+            'Should tag the objects in a worker thread.'))
+        result = asyncio.run(utils.auntag_objects(
+            DummyModel.objects.all()))
+        self.assertEqual(result['items_removed'], 2, msg=(
+            'Should untag the objects in a worker thread.'))
+
+        with translation.override('de'):
+            asyncio.run(utils.atag_objects([self.dummy], ['Neu']))
+        self.assertEqual(
+            Tag.objects.get(slug='neu').translations.get().language_code,
+            'de', msg='Should create the tags in the active language.')
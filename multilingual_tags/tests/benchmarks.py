@@ -0,0 +1,194 @@
+"""
+Scenarios for the performance tests and the ``benchmark_tags`` command.
+
+Each scenario takes the number of tags per object, creates its data and
+returns a function, that runs the measured code path once. ``audit_imports``
+measures the cold start of a process using the app.
+
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Tag
+from ..utils import tag_objects
+from .test_app.forms import DummyModelForm
+from .test_app.models import DummyModel
+
+
+#: The numbers of tags per object, that every scenario is run with.
+SCALES = (1, 10, 100)
+
+
+def create_dummies(num_objects, num_tags):
+    """Creates dummies, that are each tagged with ``num_tags`` tags."""
+    user, created = User.objects.get_or_create(username='benchmark')
+    DummyModel.objects.bulk_create([
+        DummyModel(charfield='dummy', user=user)
+        for i in range(0, num_objects)])
+    dummies = DummyModel.objects.filter(user=user)
+    tag_objects(dummies, ['Tag {0}'.format(i) for i in range(0, num_tags)],
+                language='en')
+    return list(dummies)
+
+
+def get_for_obj(num_tags):
+    dummy = create_dummies(1, num_tags)[0]
+    return lambda: list(Tag.objects.get_for_obj(dummy))
+
+
+def get_for_model(num_tags):
+    create_dummies(10, num_tags)
+    return lambda: list(Tag.objects.get_for_model(DummyModel))
+
+
+def get_for_queryset(num_tags):
+    create_dummies(10, num_tags)
+    return lambda: list(Tag.objects.get_for_queryset(
+        DummyModel.objects.all()))
+
+
+def form_save(num_tags):
+    dummy = create_dummies(1, 0)[0]
+    data = {
+        'charfield': 'dummy',
+        'tags': ','.join('Form Tag {0}'.format(i) for i in range(0, num_tags)),
+    }
+
+    def run():
+        form = DummyModelForm(data=data, instance=dummy)
+        assert form.is_valid(), form.errors
+        form.save()
+
+    def reset():
+        # deletes the created tags with their items
+        Tag.objects.filter(slug__startswith='form-tag-').delete()
+    run.reset = reset
+    return run
+
+
+def admin_inline(num_tags):
+    dummy = create_dummies(1, num_tags)[0]
+    client = Client()
+    client.force_login(User.objects.create_superuser(
+        'benchmark-admin', 'admin@example.com', 'test'))
+    url = reverse('admin:test_app_dummymodel_change', args=[dummy.pk])
+
+    def run():
+        resp = client.get(url)
+        assert resp.status_code == 200, resp.status_code
+    return run
+
+
+def admin_inline_save(num_tags):
+    dummy = create_dummies(1, num_tags)[0]
+    client = Client()
+    client.force_login(User.objects.create_superuser(
+        'benchmark-admin', 'admin@example.com', 'test'))
+    url = reverse('admin:test_app_dummymodel_change', args=[dummy.pk])
+    prefix = 'multilingual_tags-taggeditem-content_type-object_id'
+    items = list(dummy.tags.all())
+    tag = Tag.objects.create(slug='admin-tag')
+    data = {
+        'charfield': 'dummy',
+        'user': dummy.user_id,
+        prefix + '-TOTAL_FORMS': len(items) + 1,
+        prefix + '-INITIAL_FORMS': len(items),
+        prefix + '-MIN_NUM_FORMS': 0,
+        prefix + '-MAX_NUM_FORMS': 1000,
+        # adds one tag in the extra row
+        prefix + '-{0}-tag'.format(len(items)): tag.pk,
+    }
+    for i, item in enumerate(items):
+        data.update({
+            '{0}-{1}-id'.format(prefix, i): item.pk,
+            '{0}-{1}-tag'.format(prefix, i): item.tag_id,
+        })
+
+    def run():
+        resp = client.post(url, data)
+        assert resp.status_code == 302, resp.status_code
+
+    def reset():
+        # removes the added item, so that every run adds it again
+        dummy.tags.filter(tag=tag).delete()
+    run.reset = reset
+    return run
+
+
+SCENARIOS = OrderedDict([
+    ('TagManager.get_for_obj', get_for_obj),
+    ('TagManager.get_for_model', get_for_model),
+    ('TagManager.get_for_queryset', get_for_queryset),
+    ('TaggingFormMixin clean + save', form_save),
+    ('TaggedItemInline change view', admin_inline),
+    ('TaggedItemInline save', admin_inline_save),
+])
+
+
+def measure(func):
+    """
+    Runs the function and returns the number of queries and seconds.
+
+    A ``reset`` attribute of the function is called afterwards without being
+    measured, e.g. to undo the writes of the run, so that it can be repeated.
+
+    """
+    with CaptureQueriesContext(connection) as context:
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+    if hasattr(func, 'reset'):
+        func.reset()
+    return len(context.captured_queries), duration
+
+
+#: The modules, that processes only reading tags import after the setup.
+IMPORT_MODULES = (
+    'multilingual_tags.models',
+    'multilingual_tags.utils',
+    'multilingual_tags.forms.mixins',
+    'multilingual_tags.views',
+    'multilingual_tags.middleware',
+)
+
+AUDIT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+results = [('django.setup()', time.perf_counter() - start, list(sys.modules))]
+for name in sys.argv[1:]:
+    loaded = set(sys.modules)
+    start = time.perf_counter()
+    __import__(name)
+    results.append((name, time.perf_counter() - start,
+                    [module for module in sys.modules if module not in loaded]))
+print(json.dumps(results))
+"""
+
+
+def audit_imports(modules=IMPORT_MODULES):
+    """
+    Imports the modules in a fresh interpreter after ``django.setup()``.
+
+    Returns a list of ``(name, seconds, modules)`` tuples, the first one for
+    the setup itself, with the names of the modules each step imported.
+
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE,
+               PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.check_output(
+        [sys.executable, '-c', AUDIT_SCRIPT] + list(modules), env=env)
+    return [tuple(result) for result in json.loads(output.decode())]
@@ -0,0 +1,89 @@
+"""Tests for the cache of the ``multilingual_tags`` app."""
+from unittest.mock import patch
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache as default_cache
+from django.test import TestCase
+
+from mixer.backend.django import mixer
+
+from .. import app_settings, cache, signals
+from ..models import Tag
+from .test_app.forms import DummyModelForm
+from .test_app.models import DummyModel
+
+
+@patch.object(app_settings, 'CACHE_ENABLED', True)
+class CacheTestCase(TestCase):
+    """Tests for the cache functions and their invalidation."""
+    longMessage = True
+
+    def setUp(self):
+        signals.connect_receivers()
+        self.addCleanup(signals.disconnect_receivers)
+        default_cache.clear()
+        self.dummy = mixer.blend('test_app.DummyModel')
+        self.translation = mixer.blend('multilingual_tags.TagTranslation',
+                                       language_code='en', name='Foo')
+        self.tag = self.translation.master
+        self.item = mixer.blend(
+            'multilingual_tags.TaggedItem', tag=self.tag,
+            content_type=ContentType.objects.get_for_model(DummyModel),
+            object_id=self.dummy.pk)
+
+    def test_get_tag_names(self):
+        cache.get_tag_names([self.tag.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                cache.get_tag_names([self.tag.pk]),
+                {self.tag.pk: (self.tag.slug, {'en': 'Foo'})},
+                msg='Should return the cached names.')
+
+        self.translation.name = 'Bar'
+        self.translation.save()
+        self.assertEqual(
+            cache.get_tag_names([self.tag.pk]),
+            {self.tag.pk: (self.tag.slug, {'en': 'Bar'})},
+            msg='Saving a translation should invalidate the names.')
+
+        Tag.objects.filter(pk=self.tag.pk).delete()
+        self.assertEqual(cache.get_tag_names([self.tag.pk]), {}, msg=(
+            'Deleting a tag should invalidate the names.'))
+
+    def test_get_tags_for_obj(self):
+        cache.get_tags_for_obj(self.dummy)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                cache.get_tags_for_obj(self.dummy), [self.tag.pk],
+                msg='Should return the cached tags.')
+
+        self.item.delete()
+        self.assertEqual(cache.get_tags_for_obj(self.dummy), [], msg=(
+            'Deleting an item should invalidate the tags of the object.'))
+
+        form = DummyModelForm(data={'charfield': 'foo', 'tags': 'Foo, Baz'},
+                              instance=self.dummy)
+        self.assertTrue(form.is_valid())
+        form.save()
+        DummyModelForm(instance=self.dummy)
+        with self.assertNumQueries(0):
+            form = DummyModelForm(instance=self.dummy)
+            self.assertEqual(form.fields['tags'].initial, 'Foo,Baz', msg=(
+                'Saving the form should invalidate the tags of the object'
+                ' and the initial value should be read from the cache.'))
+
+    def test_rename(self):
+        DummyModelForm(instance=self.dummy)
+        Tag.objects.rename(self.tag, 'Bar', 'en')
+        form = DummyModelForm(instance=self.dummy)
+        self.assertEqual(form.fields['tags'].initial, 'Bar', msg=(
+            'Renaming a tag should not leave the old name in the cache.'))
+        form = DummyModelForm(
+            data={'charfield': 'foo', 'tags': form.fields['tags'].initial},
+            instance=self.dummy)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(
+            list(self.dummy.tags.values_list('tag__slug', flat=True)),
+            ['bar'], msg='Saving the initial value should keep the tag.')
+        self.assertFalse(Tag.objects.filter(slug='foo').exists())
@@ -1,8 +1,10 @@
 """Tests for the form mixins of the ``multilingual_tags`` app."""
+from django import forms
 from django.test import TestCase
 
 from mixer.backend.django import mixer
 
+from .. import utils
 from ..models import Tag, TaggedItem
 from .test_app.forms import DummyModelForm, LimitedDummyModelForm
 from .test_app.models import DummyModel
@@ -36,8 +38,173 @@ class TaggingFormMixinTestCase(TestCase):
             TaggedItem.objects.all()[0].user, self.dummy.user,
             msg='The form should have added the user to the taggeditems.')
 
+        self.assertEqual(
+            form.fields['tags'].widget.attrs['data-tags-url'],
+            '/tags/autocomplete/',
+            msg='The field should point to the autocomplete view.')
+
         form = LimitedDummyModelForm(
             data=self.data, instance=self.dummy)
         self.assertFalse(form.is_valid(), msg=(
             'The form should not be valid when there are too many tags.'
         ))
+
+    def test_clean(self):
+        data = dict(self.data, tags=u'tagging, test, Test, foo, , bar')
+        form = DummyModelForm(data=data, instance=self.dummy)
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid(), msg=(
+                'The form should be valid. Errors: {0}'.format(form.errors)))
+        self.assertEqual(
+            form.cleaned_data['tags'], ['tagging', 'test', 'foo', 'bar'],
+            msg='Duplicate and blank tags should be dropped.')
+
+        form = DummyModelForm(
+            data=dict(self.data, tags=u'{0}, test'.format('x' * 65)),
+            instance=self.dummy)
+        self.assertFalse(form.is_valid(), msg=(
+            'The form should not be valid when a tag is too long.'))
+        self.assertEqual(Tag.objects.count(), 0, msg=(
+            'Validating the form should not create any tags.'))
+
+        data = dict(self.data, tags=u'東京, Москва, foo')
+        form = DummyModelForm(data=data, instance=self.dummy)
+        self.assertTrue(form.is_valid(), msg=(
+            'The form should be valid. Errors: {0}'.format(form.errors)))
+        self.assertEqual(
+            form.cleaned_data['tags'], [u'東京', u'Москва', u'foo'],
+            msg='Should keep names without an ASCII slug.')
+        form.save()
+        self.assertEqual(
+            sorted(self.dummy.tags.values_list('tag__slug', flat=True)),
+            ['foo', u'москва', u'東京'], msg=(
+                'Should save the names without an ASCII slug.'))
+
+    def test_save(self):
+        mixer.blend('multilingual_tags.TagTranslation', language_code='en',
+                    master__slug='tagging')
+        form = DummyModelForm(data=dict(self.data, tags=u'tagging, a, b, c'),
+                              instance=self.dummy)
+        self.assertTrue(form.is_valid(), msg=(
+            'The form should be valid. Errors: {0}'.format(form.errors)))
+        # update, tags (4), existing items and insert plus the savepoints
+        with self.assertNumQueries(9):
+            form.save()
+        self.assertEqual(
+            sorted(self.dummy.tags.values_list('tag__slug', flat=True)),
+            ['a', 'b', 'c', 'tagging'])
+
+        form = DummyModelForm(data=dict(self.data, tags=u'b, c, d'),
+                              instance=self.dummy)
+        self.assertTrue(form.is_valid(), msg=(
+            'The form should be valid. Errors: {0}'.format(form.errors)))
+        instance = form.save(commit=False)
+        instance.save()
+        form.save_m2m()
+        self.assertEqual(
+            sorted(self.dummy.tags.values_list('tag__slug', flat=True)),
+            ['b', 'c', 'd'], msg=(
+                'Removed tags should be deleted and new ones added.'))
+
+    def test_own_clean_method(self):
+        class CleaningForm(DummyModelForm):
+            def clean_tags(self):
+                return self.cleaned_data['tags'].lower()
+
+        form = CleaningForm(data=self.data, instance=self.dummy)
+        self.assertTrue(form.is_valid(), msg=(
+            'The form should be valid. Errors: {0}'.format(form.errors)))
+        self.assertEqual(form.cleaned_data['tags'], 'tagging, test', msg=(
+            'Should return the value of the own clean method.'))
+        form.save()
+        form = CleaningForm(data=self.data, instance=self.dummy)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(TaggedItem.objects.count(), 2, msg=(
+            'Should still save the entered tags, when the form cleans the'
+            ' tag field itself.'))
+
+        class SuperCleaningForm(LimitedDummyModelForm):
+            def clean_tags(self):
+                return super(SuperCleaningForm, self).clean_tags()
+
+        form = SuperCleaningForm(data=self.data, instance=self.dummy)
+        self.assertFalse(form.is_valid(), msg=(
+            'The form should not be valid when there are too many tags.'))
+        self.assertEqual(
+            form.errors['tags'], ['You cannot add more than 1 tags.'], msg=(
+                'Should validate the tags once, when a clean method calls'
+                ' the one of its parent class.'))
+
+    def test_formset(self):
+        self.assertEqual(
+            LimitedDummyModelForm._tag_field_options['max_tags'], 1, msg=(
+                'Should resolve the field configuration per class.'))
+        DummyModelForm(data=self.data, instance=self.dummy).save()
+        mixer.cycle(2).blend('test_app.DummyModel')
+        FormSet = forms.modelformset_factory(
+            DummyModel, form=DummyModelForm, extra=0)
+        queryset = DummyModel.objects.order_by('pk')
+        utils.prefetch_tags(queryset)
+        with self.assertNumQueries(0):
+            formset = FormSet(queryset=queryset)
+            initial = [form.fields['tags'].initial for form in formset]
+        self.assertEqual(initial, ['tagging,test', '', ''], msg=(
+            'Should take the initial tags from prefetch_tags.'))
+
+        data = {
+            'form-TOTAL_FORMS': '3',
+            'form-INITIAL_FORMS': '3',
+        }
+        for index, dummy in enumerate(queryset):
+            data.update({
+                'form-{0}-id'.format(index): dummy.pk,
+                'form-{0}-charfield'.format(index): dummy.charfield,
+                'form-{0}-tags'.format(index): 'tagging, formset',
+            })
+        formset = FormSet(data=data, queryset=queryset)
+        self.assertTrue(formset.is_valid(), msg=(
+            'The formset should be valid. Errors: {0}'.format(
+                formset.errors)))
+        formset.save()
+        for dummy in queryset:
+            self.assertEqual(
+                sorted(dummy.tags.values_list('tag__slug', flat=True)),
+                ['formset', 'tagging'], msg=(
+                    'Should save the tags entered in each form of the'
+                    ' formset.'))
+
+    def test_prefix(self):
+        DummyModelForm(data=self.data, instance=self.dummy).save()
+        form = DummyModelForm(
+            data={'dummy-charfield': 'foobar', 'dummy-tags': 'test, foo'},
+            instance=self.dummy, prefix='dummy')
+        self.assertTrue(form.is_valid(), msg=(
+            'The form should be valid. Errors: {0}'.format(form.errors)))
+        form.save()
+        self.assertEqual(
+            sorted(self.dummy.tags.values_list('tag__slug', flat=True)),
+            ['foo', 'test'], msg=(
+                'Should read the tags with the prefix of the form.'))
+
+    def test_field_not_submitted(self):
+        class OptionalForm(DummyModelForm):
+            tag_field = dict(DummyModelForm.tag_field, required=False)
+
+        DummyModelForm(data=self.data, instance=self.dummy).save()
+        form = OptionalForm(data={'charfield': 'foobar'}, instance=self.dummy)
+        self.assertTrue(form.is_valid(), msg=(
+            'The form should be valid. Errors: {0}'.format(form.errors)))
+        with self.assertNumQueries(1):
+            form.save()
+        self.assertEqual(TaggedItem.objects.count(), 2, msg=(
+            'Should not touch the stored tags, when the tag field was not'
+            ' submitted.'))
+
+        form = OptionalForm(
+            data={'charfield': 'foobar', 'tags': ''}, instance=self.dummy)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(TaggedItem.objects.count(), 0, msg=(
+            'Should remove the stored tags, when the tag field is submitted'
+            ' empty.'))
@@ -0,0 +1,83 @@
+"""
+Query plan tests for the indexes of the ``multilingual_tags`` app.
+
+Each test explains one of the queries issued by the ``TagManager``, the form
+mixin or the autocomplete view and asserts, that the database uses the index
+added for it. The plans are checked on SQLite and PostgreSQL. On PostgreSQL
+sequential scans are disabled, since the planner would prefer them for the
+tiny test tables.
+
+"""
+from unittest import skipUnless
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+
+from .. import models, views
+from .test_app.models import DummyModel
+
+
+@skipUnless(connection.vendor in ('sqlite', 'postgresql'),
+            'Query plans are only checked on SQLite and PostgreSQL.')
+class IndexUsageTestCase(TestCase):
+    """Tests, that the hot queries use the indexes."""
+    longMessage = True
+
+    def setUp(self):
+        self.ctype = ContentType.objects.get_for_model(DummyModel)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan TO off')
+
+    def assertUsesIndex(self, qs, index_name):
+        plan = qs.explain()
+        self.assertIn(index_name, plan, msg=(
+            'The query should use the index. Plan:\n{0}'.format(plan)))
+
+    def test_get_for_model(self):
+        self.assertUsesIndex(models.Tag.objects.get_for_model(DummyModel),
+                             'multilingual_ti_ctype_tag')
+
+    def test_get_for_obj(self):
+        # the index of the unique constraint
+        self.assertUsesIndex(
+            models.Tag.objects.get_for_obj(DummyModel(pk=1)), 'uniq')
+
+    def test_objects_for_tag(self):
+        self.assertUsesIndex(
+            models.TaggedItem.objects.filter(
+                tag_id=1, content_type=self.ctype).values('object_id'),
+            'multilingual_ti_tag_ctype')
+
+    def test_no_redundant_indexes(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, models.TaggedItem._meta.db_table)
+        columns = [c['columns'] for c in constraints.values() if c['index']]
+        self.assertNotIn(['tag_id'], columns, msg=(
+            'The tag should only be indexed by the composite indexes.'))
+        self.assertNotIn(['content_type_id'], columns, msg=(
+            'The content type should only be indexed by the composite'
+            ' indexes.'))
+
+    def test_translation_name(self):
+        self.assertUsesIndex(
+            models.TagTranslation.objects.filter(
+                language_code='en', name='Foo'),
+            'multilingual_tagtrans_name')
+
+    def test_translation_normalized_name(self):
+        self.assertUsesIndex(
+            models.TagTranslation.objects.filter(
+                language_code='en', normalized_name__in=['foo', 'bar']),
+            'multilingual_tagtrans_norm')
+
+    def test_autocomplete(self):
+        qs = views.TagAutocompleteView().get_queryset('Fo')
+        self.assertUsesIndex(qs, 'multilingual_tagtrans_norm')
+        # the prefix has to bound the index scan, not only the language
+        condition = {'sqlite': 'normalized_name>?',
+                     'postgresql': 'normalized_name ~>=~'}[connection.vendor]
+        self.assertIn(condition, qs.explain(), msg=(
+            'The index should be searched for the prefix.'))
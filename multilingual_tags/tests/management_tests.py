@@ -0,0 +1,188 @@
+"""Tests for the management commands of the ``multilingual_tags`` app."""
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache as default_cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from mixer.backend.django import mixer
+
+from .. import app_settings, cache
+from ..models import Tag, TagCount, TaggedItem, TagTranslation
+from .test_app.models import DummyModel
+
+
+class ExportImportTagsTestCase(TestCase):
+    """Tests for the ``export_tags`` and ``import_tags`` commands."""
+    longMessage = True
+
+    def setUp(self):
+        default_cache.clear()
+        self.dummy = mixer.blend('test_app.DummyModel')
+        self.tag = mixer.blend('multilingual_tags.TagTranslation',
+                               language_code='en', name='Foo').master
+        self.tag.translations.create(language_code='de', name='Fu')
+        self.untranslated_tag = mixer.blend('multilingual_tags.Tag')
+        mixer.blend(
+            'multilingual_tags.TaggedItem', tag=self.tag,
+            content_type=ContentType.objects.get_for_model(DummyModel),
+            object_id=self.dummy.pk)
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def get_state(self):
+        return (
+            sorted(TagTranslation.objects.values_list(
+                'master__slug', 'language_code', 'name')),
+            sorted(Tag.objects.values_list('slug', flat=True)),
+            list(TaggedItem.objects.values_list(
+                'tag__slug', 'content_type', 'object_id')),
+        )
+
+    def assertRoundTrip(self, fmt):
+        state = self.get_state()
+        call_command('export_tags', format=fmt, output=self.path,
+                     chunk_size=1, stderr=StringIO())
+        Tag.objects.all().delete()
+        for i in range(0, 2):
+            call_command('import_tags', self.path, format=fmt,
+                         batch_size=1, stderr=StringIO())
+            self.assertEqual(self.get_state(), state, msg=(
+                'Importing the export should restore the tags.'))
+
+    def test_jsonl(self):
+        out = StringIO()
+        call_command('export_tags', tags_only=True, stdout=out,
+                     stderr=StringIO())
+        self.assertEqual(
+            json.loads(out.getvalue().splitlines()[0]),
+            {'type': 'tag', 'slug': self.tag.slug,
+             'translations': {'de': 'Fu', 'en': 'Foo'}})
+        self.assertRoundTrip('jsonl')
+
+        TagTranslation.objects.filter(language_code='en').update(name='Bar')
+        call_command('import_tags', self.path, stderr=StringIO())
+        self.assertEqual(
+            Tag.objects.language('en').get(slug=self.tag.slug).name, 'Foo',
+            msg='Importing should update changed names.')
+
+    def test_csv(self):
+        self.assertRoundTrip('csv')
+
+    def test_invalid_input(self):
+        for content in [
+                '{"type": "foo"}\n',
+                '{"type": "tag"\n',
+                '["tag"]\n',
+                '{"type": "item", "tag": "foo", "object_id": 1}\n',
+                '{"type": "item", "tag": "foo", "object_id": "x",'
+                ' "content_type": ["foo", "bar"]}\n']:
+            with open(self.path, 'w') as stream:
+                stream.write(content)
+            with self.assertRaises(CommandError, msg=content):
+                call_command('import_tags', self.path, stderr=StringIO())
+        with open(self.path, 'w') as stream:
+            stream.write('slug,name\nfoo,Foo\n')
+        with self.assertRaises(CommandError, msg='Missing CSV columns.'):
+            call_command('import_tags', self.path, format='csv',
+                         stderr=StringIO())
+
+        with open(self.path, 'w') as stream:
+            stream.write('\n{"type": "item", "tag": "missing",'
+                         ' "content_type": ["foo", "bar"], "object_id": 1}\n')
+        err = StringIO()
+        call_command('import_tags', self.path, stderr=err)
+        self.assertIn('skipped 1 items', err.getvalue())
+
+    def test_stdin(self):
+        stdin = StringIO('{"type": "tag", "slug": "new",'
+                         ' "translations": {"en": "New"}}\n')
+        with patch('sys.stdin', stdin):
+            call_command('import_tags', stderr=StringIO())
+        self.assertEqual(Tag.objects.language('en').get(slug='new').name,
+                         'New', msg='Should read the records from stdin.')
+
+    def test_caches(self):
+        dummy = mixer.blend('test_app.DummyModel')
+        with open(self.path, 'w') as stream:
+            stream.write(
+                '{{"type": "tag", "slug": "{0}", "translations":'
+                ' {{"en": "Bar"}}}}\n'
+                '{{"type": "item", "tag": "{0}", "content_type":'
+                ' ["test_app", "dummymodel"], "object_id": {1}}}\n'.format(
+                    self.tag.slug, dummy.pk))
+        self.assertEqual(
+            Tag.objects.language('en').get(pk=self.tag.pk).name, 'Foo')
+        with patch.object(app_settings, 'CACHE_ENABLED', True):
+            self.assertEqual(cache.get_tags_for_obj(dummy), [])
+            call_command('import_tags', self.path, stderr=StringIO())
+            self.assertEqual(
+                cache.get_tags_for_obj(dummy), [self.tag.pk], msg=(
+                    'Should invalidate the tags of the imported objects.'))
+        self.assertEqual(
+            Tag.objects.language('en').get(pk=self.tag.pk).name, 'Bar',
+            msg='Should invalidate the translations cached by parler.')
+
+    def test_rebuild(self):
+        call_command('export_tags', output=self.path, stderr=StringIO())
+        TaggedItem.objects.all().delete()
+        other_count = TagCount.objects.create(
+            tag=self.untranslated_tag, count=5,
+            content_type=ContentType.objects.get_for_model(DummyModel))
+        with patch.object(app_settings, 'USE_COUNTERS', True), \
+                patch.object(app_settings, 'USE_COOCCURRENCES', True):
+            err = StringIO()
+            call_command('import_tags', self.path, stderr=err)
+            self.assertIn('1 tagged items', err.getvalue())
+            err = StringIO()
+            call_command('import_tags', self.path, stderr=err)
+            self.assertIn('0 tagged items', err.getvalue(), msg=(
+                'Should only count the inserted items.'))
+        self.assertEqual(
+            list(TagCount.objects.exclude(pk=other_count.pk).values_list(
+                'tag', 'count')),
+            [(self.tag.pk, 1)], msg='Should rebuild the counters.')
+        self.assertEqual(
+            TagCount.objects.get(pk=other_count.pk).count, 5, msg=(
+                'Should only rebuild the counters of the imported items.'))
+
+
+class TagMaintenanceCommandsTestCase(TestCase):
+    """Tests for the ``merge_tags``, ``rename_tag`` and ``prune_tags``."""
+    longMessage = True
+
+    def setUp(self):
+        self.tags = mixer.cycle(3).blend('multilingual_tags.Tag')
+        mixer.blend(
+            'multilingual_tags.TaggedItem', tag=self.tags[0],
+            content_type=ContentType.objects.get_for_model(DummyModel),
+            object_id=mixer.blend('test_app.DummyModel').pk)
+
+    def test_commands(self):
+        out = StringIO()
+        call_command('prune_tags', dry_run=True, stdout=out)
+        self.assertIn('Found 2 unused tags.', out.getvalue())
+
+        call_command('merge_tags', self.tags[0].slug, self.tags[1].slug,
+                     stdout=out)
+        self.assertEqual(Tag.objects.count(), 2)
+        with self.assertRaises(CommandError):
+            call_command('merge_tags', self.tags[0].slug, 'missing')
+
+        call_command('rename_tag', self.tags[0].slug, 'Foo Bar',
+                     language='en', stdout=out)
+        self.assertTrue(Tag.objects.filter(slug='foo-bar').exists())
+        with self.assertRaises(CommandError):
+            call_command('rename_tag', 'missing', 'Foo')
+
+        call_command('prune_tags', stdout=out)
+        self.assertEqual(list(Tag.objects.values_list('slug', flat=True)),
+                         ['foo-bar'])
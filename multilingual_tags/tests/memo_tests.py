@@ -0,0 +1,59 @@
+"""Tests for the request memo of the ``multilingual_tags`` app."""
+from django.contrib.contenttypes.models import ContentType
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.utils import translation
+
+from mixer.backend.django import mixer
+
+from .. import memo, signals
+from ..middleware import TagMemoMiddleware
+from ..models import TaggedItem
+from .test_app.models import DummyModel
+
+
+class MemoTestCase(TestCase):
+    """Tests for the functions of the ``memo`` module."""
+    longMessage = True
+
+    def setUp(self):
+        signals.connect_receivers()
+        self.addCleanup(signals.disconnect_receivers)
+        self.dummy = mixer.blend('test_app.DummyModel')
+        self.tag = mixer.blend('multilingual_tags.TagTranslation',
+                               language_code='en').master
+        self.ctype = ContentType.objects.get_for_model(DummyModel)
+        TaggedItem.objects.create(
+            tag=self.tag, content_type=self.ctype, object_id=self.dummy.pk)
+
+    def test_memo(self):
+        with self.assertNumQueries(2):
+            memo.get_for_obj(self.dummy)
+            memo.get_for_obj(self.dummy)
+        with memo.activated():
+            with self.assertNumQueries(2):
+                self.assertEqual(memo.get_for_obj(self.dummy), [self.tag])
+                self.assertEqual(memo.get_for_obj(self.dummy), [self.tag])
+                self.assertEqual(memo.get_for_model(DummyModel), [self.tag])
+                memo.get_for_model(DummyModel)
+            with translation.override('de'), self.assertNumQueries(1):
+                memo.get_for_obj(self.dummy)
+
+            other_tag = mixer.blend('multilingual_tags.Tag')
+            TaggedItem.objects.create(
+                tag=other_tag, content_type=self.ctype,
+                object_id=self.dummy.pk)
+            self.assertEqual(
+                set(memo.get_for_obj(self.dummy)), {self.tag, other_tag},
+                msg='Should be cleared when tagged items are written.')
+
+    def test_middleware(self):
+        def view(request):
+            memo.get_for_obj(self.dummy)
+            memo.get_for_obj(self.dummy)
+            return HttpResponse()
+        middleware = TagMemoMiddleware(view)
+        with self.assertNumQueries(1):
+            middleware(RequestFactory().get('/'))
+        with self.assertNumQueries(2):
+            view(None)
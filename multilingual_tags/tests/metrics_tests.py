@@ -0,0 +1,59 @@
+"""Tests for the instrumentation of the ``multilingual_tags`` app."""
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from mixer.backend.django import mixer
+
+from .. import app_settings, metrics
+from ..models import Tag
+from .test_app.forms import DummyModelForm
+
+
+class RecordingBackend(metrics.MetricsBackend):
+    """Keeps the recorded calls in a list."""
+    calls = []
+
+    def record(self, name, duration, queries, **counts):
+        self.calls.append((name, queries, counts))
+
+
+@patch.object(app_settings, 'METRICS_BACKEND',
+              'multilingual_tags.tests.metrics_tests.RecordingBackend')
+class InstrumentTestCase(TestCase):
+    """Tests for the ``instrument`` context manager."""
+    longMessage = True
+
+    def setUp(self):
+        RecordingBackend.calls = []
+
+    def test_instrument(self):
+        with metrics.instrument('test', tags=2) as counts:
+            list(Tag.objects.all())
+            counts['tags_created'] = 1
+        self.assertEqual(RecordingBackend.calls, [
+            ('test', 1, {'tags': 2, 'tags_created': 1})],
+            msg='Should record the queries and counts of the block.')
+
+        with patch.object(app_settings, 'METRICS_BACKEND', None):
+            with metrics.instrument('test') as counts:
+                counts['tags'] = 1
+        self.assertEqual(len(RecordingBackend.calls), 1, msg=(
+            'Should not record anything without a backend.'))
+
+    def test_form(self):
+        dummy = mixer.blend('test_app.DummyModel')
+        form = DummyModelForm(
+            data={'charfield': 'dummy', 'tags': 'a, b'}, instance=dummy)
+        self.assertTrue(form.is_valid(), msg='Form should be valid.')
+        form.save()
+        names = [call[0] for call in RecordingBackend.calls]
+        self.assertEqual(names, [
+            'form.clean', 'tags.get_or_create_many', 'form.save'],
+            msg='Should record the nested calls in the order they end.')
+        self.assertEqual(RecordingBackend.calls[1][2], {
+            'tags': 2, 'tags_created': 2}, msg=(
+            'Should record the created tags.'))
+        self.assertEqual(RecordingBackend.calls[2][2], {
+            'tags': 2, 'items_added': 2, 'items_removed': 0}, msg=(
+            'Should record the added and removed items.'))
@@ -1,11 +1,18 @@
 """Tests for the models of the multilingual_tags app."""
+from io import StringIO
+from unittest.mock import patch
+
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache as default_cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 
 from mixer.backend.django import mixer
 
-from .. import models
+from .. import app_settings, cache, models, utils
+from .test_app.forms import DummyModelForm
 from .test_app.models import DummyModel
 
 
@@ -51,6 +58,8 @@ class TagManagerTestCase(TestCase):
     longMessage = True
 
     def setUp(self):
+        # parler caches the translations by the re-used primary keys
+        default_cache.clear()
         self.dummy = mixer.blend('test_app.DummyModel')
         self.tag = mixer.blend('multilingual_tags.TagTranslation',
                                language_code='en').master
@@ -74,3 +83,452 @@ class TagManagerTestCase(TestCase):
                 tagged_items__content_type=ContentType.objects.get_for_model(
                     DummyModel))),
             msg='Expected different tags from the manager.')
+
+    def test_get_for_queryset(self):
+        mixer.blend('test_app.DummyModel')
+        ContentType.objects.get_for_model(DummyModel)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                list(models.Tag.objects.get_for_queryset(
+                    DummyModel.objects.all())),
+                [self.tag], msg='Expected different tags from the manager.')
+        self.assertEqual(
+            list(models.Tag.objects.get_for_queryset(
+                DummyModel.objects.none())), [],
+            msg='Should return no tags for an empty queryset.')
+
+    def test_semi_join(self):
+        sql = str(models.Tag.objects.get_for_model(DummyModel).query)
+        self.assertIn('EXISTS', sql, msg=(
+            'Should check the items with a semi-join.'))
+        self.assertNotIn('DISTINCT', sql, msg=(
+            'Should not need to remove duplicate tags.'))
+
+    def test_stream_and_pages(self):
+        translations = mixer.cycle(4).blend(
+            'multilingual_tags.TagTranslation', language_code='de')
+        tags = [self.tag] + [t.master for t in translations]
+        with self.assertNumQueries(1):
+            streamed = list(models.Tag.objects.with_names('de').stream(
+                chunk_size=2))
+        self.assertEqual(streamed, tags, msg='Should stream all tags.')
+        self.assertEqual(
+            [str(tag) for tag in streamed],
+            [self.tag.name] + [t.name for t in translations],
+            msg='Should keep the resolved names.')
+
+        with self.assertNumQueries(3):
+            pages = list(models.Tag.objects.pages(page_size=2))
+        self.assertEqual(pages, [tags[0:2], tags[2:4], tags[4:]], msg=(
+            'Should read the pages by id.'))
+        self.assertEqual(
+            models.Tag.objects.page_after(tags[3].pk), tags[4:])
+
+    def test_with_names(self):
+        german = mixer.blend('multilingual_tags.TagTranslation',
+                             language_code='de', name='Nur deutsch').master
+        untranslated = mixer.blend('multilingual_tags.Tag', slug='no-name')
+        with self.assertNumQueries(1):
+            names = [str(tag) for tag in models.Tag.objects.with_names(
+                'de').order_by('pk')]
+        self.assertEqual(
+            names, [self.tag.name, 'Nur deutsch', 'no-name'],
+            msg='Should fall back to the fallback language and the slug.')
+        self.assertEqual(
+            models.Tag.objects.with_names('en').get(pk=german.pk).display_name,
+            german.slug, msg=(
+                'Should not fall back to other languages than the'
+                ' configured ones.'))
+        self.assertEqual(
+            str(untranslated), 'no-name',
+            msg='Should still work without the annotation.')
+
+    def test_get_with_counts(self):
+        other_tag = mixer.blend('multilingual_tags.TagTranslation',
+                                language_code='en').master
+        mixer.blend('multilingual_tags.TagTranslation', language_code='en')
+        mixer.blend(
+            'multilingual_tags.TaggedItem',
+            tag=other_tag,
+            content_type=ContentType.objects.get_for_model(DummyModel),
+            object_id=mixer.blend('test_app.DummyModel').pk)
+        ContentType.objects.get_for_model(User)
+
+        with self.assertNumQueries(1):
+            counts = [(tag, tag.usage_count)
+                      for tag in models.Tag.objects.get_with_counts(
+                          min_count=1)]
+        self.assertEqual(counts, [(self.tag, 2), (other_tag, 1)], msg=(
+            'Should return the used tags ordered by their usage.'))
+        self.assertEqual(
+            models.Tag.objects.get_with_counts().count(), 3,
+            msg='Should return unused tags without min_count.')
+        self.assertEqual(
+            [(tag, tag.usage_count) for tag in
+             models.Tag.objects.get_with_counts(User)],
+            [(self.tag, 1)], msg='Should only count items of the model.')
+        self.assertEqual(
+            [(tag, tag.usage_count) for tag in
+             models.Tag.objects.get_with_counts(
+                 DummyModel.objects.filter(pk=self.dummy.pk))],
+            [(self.tag, 1)], msg='Should only count items of the queryset.')
+        self.assertEqual(
+            list(models.Tag.objects.get_with_counts(limit=1)), [self.tag],
+            msg='Should only return the most used tags.')
+
+    def test_get_tagged_objects(self):
+        other_tag = mixer.blend('multilingual_tags.TagTranslation',
+                                language_code='en').master
+        other_dummy = mixer.blend('test_app.DummyModel')
+        mixer.blend('test_app.DummyModel')
+        for dummy in [self.dummy, other_dummy]:
+            mixer.blend(
+                'multilingual_tags.TaggedItem',
+                tag=other_tag,
+                content_type=ContentType.objects.get_for_model(DummyModel),
+                object_id=dummy.pk)
+        slugs = [self.tag.slug, other_tag.slug]
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                list(models.Tag.objects.get_tagged_objects(
+                    DummyModel, slugs).order_by('pk')),
+                [self.dummy, other_dummy],
+                msg='Should return objects with any of the tags.')
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                list(models.Tag.objects.get_tagged_objects(
+                    DummyModel, slugs, match_all=True)),
+                [self.dummy],
+                msg='Should return objects with all of the tags.')
+        self.assertEqual(
+            list(models.Tag.objects.get_tagged_objects(
+                DummyModel.objects.exclude(pk=self.dummy.pk), slugs,
+                match_all=True)), [],
+            msg='Should filter the given queryset.')
+        self.assertEqual(
+            list(models.Tag.objects.get_tagged_objects(User, [other_tag.slug])),
+            [], msg='Should only consider items of the model.')
+        self.assertEqual(
+            models.Tag.objects.get_tagged_objects(DummyModel, []).count(), 0)
+
+    def test_get_or_create_many(self):
+        with self.assertNumQueries(4):
+            tags = models.Tag.objects.get_or_create_many(
+                [self.tag.slug, 'New tag', 'new-tag', 'Other'])
+        self.assertEqual(
+            [tag.slug for tag in tags], [self.tag.slug, 'new-tag', 'other'],
+            msg='Should return one tag per slug in the given order.')
+        self.assertEqual(models.Tag.objects.count(), 3, msg=(
+            'Should only create the missing tags.'))
+        self.assertEqual(
+            models.Tag.objects.language('en').get(slug='new-tag').name,
+            'New tag', msg='Should create the translation from the name.')
+        with self.assertNumQueries(0):
+            self.assertEqual(models.Tag.objects.get_or_create_many([]), [])
+
+    def test_get_or_create_many_unicode(self):
+        self.assertEqual(models.get_slug('Caf\u00e9 au lait'), 'cafe-au-lait',
+                         msg='Should keep the ASCII slugs of names.')
+        self.assertEqual(models.get_slug('!!!'), models.get_slug(' !!! '),
+                         msg='Should derive a fallback slug from the name.')
+        tags = models.Tag.objects.get_or_create_many(
+            ['東京', 'Москва', '!!!', '?'], 'en')
+        self.assertEqual(
+            [tag.slug for tag in tags][:2],
+            ['東京', 'москва'],
+            msg='Should keep the letters of names in other scripts.')
+        self.assertEqual(len(set(tag.slug for tag in tags)), 4, msg=(
+            'Should give every name without letters its own slug.'))
+        self.assertNotIn('', [tag.slug for tag in tags], msg=(
+            'Should never create a tag with an empty slug.'))
+
+    def test_get_or_create_many_normalized(self):
+        self.assertEqual(
+            models.normalize_name(' \uff23++  Stra\u00dfe '), 'c++ strasse',
+            msg='Should NFKC normalise, casefold and collapse whitespace.')
+        cpp = models.Tag.objects.get_or_create_many(['C++'], 'en')[0]
+        self.assertEqual(
+            models.TagTranslation.objects.get(master=cpp).normalized_name,
+            'c++', msg='Should store the normalised name.')
+        csharp = models.Tag.objects.create(slug='c-sharp')
+        csharp.set_current_language('en')
+        csharp.name = 'C#'
+        csharp.save()
+        self.assertEqual(csharp.translations.get().normalized_name, 'c#',
+                         msg='Should set the normalised name on save.')
+
+        with self.assertNumQueries(1):
+            tags = models.Tag.objects.get_or_create_many(
+                ['c#', '\uff23++', 'C++', 'c'], 'en')
+        self.assertEqual(tags, [csharp, cpp], msg=(
+            'Should match the normalised names before the slugs and return'
+            ' each tag once.'))
+        self.assertEqual(
+            models.Tag.objects.get_or_create_many(['C#'], 'de'), [cpp],
+            msg='Should only match the names in the given language.')
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                models.Tag.objects.get_many(['C#', 'c-sharp', 'unknown'],
+                                            'en'), [csharp],
+                msg='Should only return the existing tags.')
+
+    def test_get_or_create_many_conflict(self):
+        def create_concurrently(execute, sql, params, many, context):
+            if sql.startswith('INSERT') and not created:
+                # another transaction creates the tag in the meantime
+                created.append(None)
+                created[0] = models.Tag.objects.create(slug='new-tag')
+            return execute(sql, params, many, context)
+
+        created = []
+        with connection.execute_wrapper(create_concurrently):
+            tags = models.Tag.objects.get_or_create_many(['New tag'], 'en')
+        self.assertEqual(tags, created, msg=(
+            'Should return the tag created by the other transaction.'))
+        self.assertEqual(
+            models.Tag.objects.language('en').get(slug='new-tag').name,
+            'New tag', msg='Should still add the missing translation.')
+
+
+class TagMaintenanceTestCase(TestCase):
+    """Tests for the merge, rename and prune methods of the `TagManager`."""
+    longMessage = True
+
+    def setUp(self):
+        default_cache.clear()
+        self.ctype = ContentType.objects.get_for_model(DummyModel)
+        self.dummies = mixer.cycle(3).blend('test_app.DummyModel')
+        self.target = mixer.blend('multilingual_tags.TagTranslation',
+                                  language_code='en', name='Foo').master
+        self.source = mixer.blend('multilingual_tags.TagTranslation',
+                                  language_code='en', name='Fooo').master
+        self.source.translations.create(language_code='de', name='Fu')
+        self.other_source = mixer.blend('multilingual_tags.Tag')
+        for tag, dummies in [(self.target, self.dummies[:1]),
+                             (self.source, self.dummies[:2]),
+                             (self.other_source, self.dummies)]:
+            for dummy in dummies:
+                mixer.blend('multilingual_tags.TaggedItem', tag=tag,
+                            content_type=self.ctype, object_id=dummy.pk)
+
+    def test_merge(self):
+        with patch.object(app_settings, 'USE_COUNTERS', True):
+            models.Tag.objects.merge(
+                [self.source, self.other_source, self.target], self.target)
+        self.assertEqual(
+            sorted(models.TaggedItem.objects.values_list(
+                'tag', 'object_id')),
+            [(self.target.pk, dummy.pk) for dummy in self.dummies],
+            msg='Each object should only be tagged once with the target.')
+        self.assertEqual(list(models.Tag.objects.all()), [self.target])
+        self.assertEqual(
+            sorted(self.target.translations.values_list(
+                'language_code', 'name')), [('de', 'Fu'), ('en', 'Foo')],
+            msg='Should add the missing translations of the sources.')
+        self.assertEqual(models.TagCount.objects.get().count, 3, msg=(
+            'Should recreate the counters of the target.'))
+
+    def test_merge_cache(self):
+        self.assertEqual(
+            models.Tag.objects.merge([self.target], self.target), self.target,
+            msg='Should do nothing without other tags.')
+        with patch.object(app_settings, 'CACHE_ENABLED', True):
+            self.assertEqual(
+                cache.get_tags_for_obj(self.dummies[2]),
+                [self.other_source.pk])
+            models.Tag.objects.merge([self.other_source], self.target)
+            self.assertEqual(
+                cache.get_tags_for_obj(self.dummies[2]), [self.target.pk],
+                msg='Should invalidate the tags of the merged objects.')
+
+    def test_merge_parler_cache(self):
+        target = models.Tag.objects.language('de').get(pk=self.target.pk)
+        self.assertEqual(
+            target.safe_translation_getter('name', any_language=True), 'Foo')
+        models.Tag.objects.merge([self.source], self.target)
+        target = models.Tag.objects.language('de').get(pk=self.target.pk)
+        self.assertEqual(
+            target.safe_translation_getter('name', any_language=True), 'Fu',
+            msg='Should invalidate the translations cached by parler.')
+
+    def test_rename(self):
+        tag = models.Tag.objects.rename(self.other_source, 'Bar', 'de')
+        self.assertEqual(tag.slug, 'bar')
+        self.assertEqual(
+            models.Tag.objects.language('de').get(pk=tag.pk).name, 'Bar')
+
+        tag = models.Tag.objects.rename(self.source, self.target.slug)
+        self.assertEqual(tag, self.target, msg=(
+            'Renaming to an existing slug should merge the tags.'))
+        self.assertFalse(
+            models.Tag.objects.filter(pk=self.source.pk).exists())
+
+    def test_prune(self):
+        unused = mixer.cycle(3).blend('multilingual_tags.Tag')
+        self.assertEqual(models.Tag.objects.prune(batch_size=2), 3)
+        self.assertFalse(models.Tag.objects.filter(
+            pk__in=[tag.pk for tag in unused]).exists())
+        self.assertEqual(models.Tag.objects.count(), 3)
+
+
+class TaggedItemQuerySetTestCase(TestCase):
+    """Tests for the `TaggedItemQuerySet` queryset class."""
+    longMessage = True
+
+    def setUp(self):
+        self.tag = mixer.blend('multilingual_tags.TagTranslation',
+                               language_code='en').master
+        for i in range(0, 3):
+            mixer.blend(
+                'multilingual_tags.TaggedItem',
+                tag=self.tag,
+                content_type=ContentType.objects.get_for_model(DummyModel),
+                object_id=mixer.blend('test_app.DummyModel').pk)
+            mixer.blend(
+                'multilingual_tags.TaggedItem',
+                tag=self.tag,
+                content_type=ContentType.objects.get_for_model(User),
+                object_id=mixer.blend('auth.User').pk)
+
+    def test_with_objects(self):
+        # items, translations and one query per content type
+        with self.assertNumQueries(4):
+            items = list(models.TaggedItem.objects.with_objects())
+            self.assertEqual(len(set(str(item) for item in items)), 6)
+        self.assertEqual(
+            [item.object for item in items],
+            [item.content_type.get_object_for_this_type(pk=item.object_id)
+             for item in items],
+            msg='Should resolve the tagged objects.')
+
+
+class TagCountManagerTestCase(TestCase):
+    """Tests for the `TagCountManager` manager class."""
+    longMessage = True
+
+    def setUp(self):
+        self.ctype = ContentType.objects.get_for_model(DummyModel)
+        self.tag = mixer.blend('multilingual_tags.TagTranslation',
+                               language_code='en').master
+        for i in range(0, 2):
+            mixer.blend(
+                'multilingual_tags.TaggedItem',
+                tag=self.tag,
+                content_type=self.ctype,
+                object_id=mixer.blend('test_app.DummyModel').pk)
+
+    def test_update_counts(self):
+        models.TagCount.objects.update_counts(self.ctype.pk, [self.tag.pk], 2)
+        models.TagCount.objects.update_counts(self.ctype.pk, [self.tag.pk], 1)
+        self.assertEqual(models.TagCount.objects.get().count, 3)
+        models.TagCount.objects.update_counts(
+            self.ctype.pk, [self.tag.pk], -5)
+        self.assertEqual(models.TagCount.objects.get().count, 0, msg=(
+            'Counters should not drop below zero.'))
+
+    def test_rebuild(self):
+        out = StringIO()
+        call_command('rebuild_tag_counts', stdout=out)
+        self.assertEqual(models.TagCount.objects.get().count, 2)
+        self.assertIn('Rebuilt 1 tag counters.', out.getvalue())
+
+        with patch.object(app_settings, 'USE_COUNTERS', True):
+            self.assertEqual(
+                [(tag, tag.usage_count) for tag in
+                 models.Tag.objects.get_with_counts(DummyModel)],
+                [(self.tag, 2)], msg='Should read the counters.')
+            self.assertEqual(
+                models.Tag.objects.get_with_counts(User).count(), 0)
+
+
+class TagCooccurrenceManagerTestCase(TestCase):
+    """Tests for the `TagCooccurrenceManager` manager class."""
+    longMessage = True
+
+    def setUp(self):
+        self.ctype = ContentType.objects.get_for_model(DummyModel)
+        self.tags = models.Tag.objects.get_or_create_many(
+            ['a', 'b', 'c'], 'en')
+        self.dummies = mixer.cycle(2).blend('test_app.DummyModel')
+        self.user = mixer.blend('auth.User')
+        for obj, tags in [(self.dummies[0], self.tags),
+                          (self.dummies[1], self.tags[:2]),
+                          (self.user, [self.tags[0], self.tags[2]])]:
+            for tag in tags:
+                models.TaggedItem.objects.create(
+                    tag=tag, object_id=obj.pk,
+                    content_type=ContentType.objects.get_for_model(obj))
+
+    def get_pairs(self):
+        return sorted(models.TagCooccurrence.objects.values_list(
+            'tag__slug', 'related_tag__slug', 'content_type__model',
+            'count'))
+
+    def test_rebuild(self):
+        out = StringIO()
+        call_command('rebuild_tag_cooccurrences', stdout=out)
+        self.assertIn('Rebuilt 8 tag co-occurrences.', out.getvalue())
+        pairs = self.get_pairs()
+        self.assertEqual(pairs, [
+            ('a', 'b', 'dummymodel', 2),
+            ('a', 'c', 'dummymodel', 1),
+            ('a', 'c', 'user', 1),
+            ('b', 'a', 'dummymodel', 2),
+            ('b', 'c', 'dummymodel', 1),
+            ('c', 'a', 'dummymodel', 1),
+            ('c', 'a', 'user', 1),
+            ('c', 'b', 'dummymodel', 1),
+        ], msg='Should count the objects of each pair in both directions.')
+
+        models.TagCooccurrence.objects.filter(tag=self.tags[2]).delete()
+        models.TagCooccurrence.objects.rebuild(tag_ids=[self.tags[2].pk])
+        self.assertEqual(self.get_pairs(), pairs, msg=(
+            'Should recreate all pairs of the given tags.'))
+
+    def test_update_for_object(self):
+        models.TagCooccurrence.objects.rebuild()
+        with patch.object(app_settings, 'USE_COOCCURRENCES', True):
+            # an admin inline saves and deletes single items
+            item = models.TaggedItem.objects.create(
+                tag=self.tags[2], content_type=self.ctype,
+                object_id=self.dummies[1].pk)
+            models.TaggedItem.objects.filter(
+                tag=self.tags[0], object_id=self.dummies[0].pk).get().delete()
+            item.tag = models.Tag.objects.get_or_create_many(['d'])[0]
+            item.save()
+
+            form = DummyModelForm(
+                data={'charfield': 'dummy', 'tags': 'b, c, d'},
+                instance=self.dummies[0])
+            self.assertTrue(form.is_valid(), msg='Form should be valid.')
+            form.save()
+
+            # the bulk write paths
+            utils.tag_objects(self.dummies, ['e'])
+            utils.untag_objects([self.dummies[1]], ['b'])
+            models.Tag.objects.merge(
+                [self.tags[2]], models.Tag.objects.get(slug='d'))
+        pairs = self.get_pairs()
+        models.TagCooccurrence.objects.rebuild()
+        self.assertEqual(
+            [pair for pair in pairs if pair[3]], self.get_pairs(),
+            msg='Should keep the same pairs as a rebuild.')
+
+    def test_get_related(self):
+        models.TagCooccurrence.objects.rebuild()
+        self.assertEqual(
+            [(tag.slug, tag.cooccurrence_count) for tag in
+             models.Tag.objects.get_related(self.tags[0], DummyModel)],
+            [('b', 2), ('c', 1)],
+            msg='Should return the related tags of the content type.')
+        self.assertEqual(
+            [(tag.slug, tag.cooccurrence_count) for tag in
+             models.Tag.objects.get_related(self.tags[0], limit=1)],
+            [('b', 2)], msg='Should count all content types.')
+        self.assertEqual(
+            [(tag.slug, tag.cooccurrence_count) for tag in
+             models.Tag.objects.get_related(
+                 models.Tag.objects.filter(slug__in=['a', 'b']),
+                 self.dummies[0])],
+            [('c', 2)], msg='Should exclude the given tags.')
@@ -0,0 +1,62 @@
+"""
+Query budgets for the hot code paths of the ``multilingual_tags`` app.
+
+Every scenario of ``benchmarks.py`` is run with 1, 10 and 100 tags per object
+and has to issue the same number of queries at every scale, so that N+1
+problems fail the build. Run ``./manage.py benchmark_tags`` to also measure
+the timings.
+
+"""
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+
+from . import benchmarks
+
+
+class QueryBudgetTestCase(TestCase):
+    """Tests, that the number of queries does not depend on the tags."""
+    longMessage = True
+
+    def assertQueryBudget(self, scenario, budget):
+        counts = []
+        for scale in benchmarks.SCALES:
+            with transaction.atomic():
+                run = benchmarks.SCENARIOS[scenario](scale)
+                counts.append(benchmarks.measure(run)[0])
+                # has to be repeatable for ``benchmark_tags --repeat``
+                benchmarks.measure(run)
+                transaction.set_rollback(True)
+        self.assertEqual(
+            len(set(counts)), 1, msg=(
+                '{0} should issue the same number of queries for {1} tags:'
+                ' {2}'.format(scenario, benchmarks.SCALES, counts)))
+        self.assertLessEqual(counts[0], budget, msg=(
+            '{0} exceeded its query budget.'.format(scenario)))
+
+    def test_tag_manager(self):
+        self.assertQueryBudget('TagManager.get_for_obj', 1)
+        self.assertQueryBudget('TagManager.get_for_model', 1)
+        self.assertQueryBudget('TagManager.get_for_queryset', 1)
+
+    def test_form(self):
+        self.assertQueryBudget('TaggingFormMixin clean + save', 11)
+
+    def test_admin_inline(self):
+        self.assertQueryBudget('TaggedItemInline change view', 10)
+        self.assertQueryBudget('TaggedItemInline save', 16)
+
+
+class ImportAuditTestCase(SimpleTestCase):
+    """Tests, that using the app does not import more than it needs."""
+    longMessage = True
+
+    def test_audit_imports(self):
+        results = benchmarks.audit_imports()
+        self.assertNotIn('asyncio', results[0][2], msg=(
+            'Loading the app should not import asyncio.'))
+        for name, seconds, modules in results[1:]:
+            self.assertEqual(
+                [module for module in modules
+                 if not module.startswith('multilingual_tags')], [], msg=(
+                    'Importing {0} after the setup should only load modules'
+                    ' of the app.'.format(name)))
@@ -0,0 +1,126 @@
+"""Tests for the signal handlers of the ``multilingual_tags`` app."""
+from unittest.mock import patch
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.deletion import Collector
+from django.test import TestCase
+
+from mixer.backend.django import mixer
+
+from .. import app_settings, signals
+from ..models import Tag, TagCooccurrence, TagCount, TaggedItem
+from .test_app.forms import DummyModelForm
+from .test_app.models import DummyModel
+
+
+@patch.object(app_settings, 'USE_COUNTERS', True)
+class TagCountSignalsTestCase(TestCase):
+    """Tests for the signal handlers, that keep the ``TagCount`` in sync."""
+    longMessage = True
+
+    def setUp(self):
+        signals.connect_receivers()
+        self.addCleanup(signals.disconnect_receivers)
+        self.dummy = mixer.blend('test_app.DummyModel')
+        self.ctype = ContentType.objects.get_for_model(DummyModel)
+        self.tag = mixer.blend('multilingual_tags.TagTranslation',
+                               language_code='en').master
+
+    def get_count(self, tag):
+        return TagCount.objects.get(tag=tag, content_type=self.ctype).count
+
+    def test_taggeditem_signals(self):
+        item = mixer.blend('multilingual_tags.TaggedItem', tag=self.tag,
+                           content_type=self.ctype, object_id=self.dummy.pk)
+        self.assertEqual(self.get_count(self.tag), 1, msg=(
+            'Creating an item should increment the counter.'))
+
+        other_tag = mixer.blend('multilingual_tags.TagTranslation',
+                                language_code='en').master
+        item.tag = other_tag
+        item.save()
+        self.assertEqual(self.get_count(self.tag), 0, msg=(
+            'Changing the tag should decrement the old counter.'))
+        self.assertEqual(self.get_count(other_tag), 1, msg=(
+            'Changing the tag should increment the new counter.'))
+
+        item.delete()
+        self.assertEqual(self.get_count(other_tag), 0, msg=(
+            'Deleting an item should decrement the counter.'))
+
+    def test_form_save(self):
+        data = {'charfield': 'foo', 'tags': 'a, b, {0}'.format(self.tag.slug)}
+        form = DummyModelForm(data=data, instance=self.dummy)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(
+            sorted(TagCount.objects.filter(count=1).values_list(
+                'tag__slug', flat=True)),
+            sorted(['a', 'b', self.tag.slug]),
+            msg='Saving the form should increment the added tags.')
+
+        form = DummyModelForm(data=dict(data, tags='a'), instance=self.dummy)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(
+            sorted(TagCount.objects.filter(count=1).values_list(
+                'tag__slug', flat=True)), ['a'],
+            msg='Saving the form should decrement the removed tags once.')
+        self.assertEqual(TaggedItem.objects.count(), 1)
+
+    @patch.object(app_settings, 'USE_COOCCURRENCES', True)
+    def test_tag_delete(self):
+        other_tag = mixer.blend('multilingual_tags.Tag')
+        dummies = mixer.cycle(50).blend('test_app.DummyModel')
+        for tag in [self.tag, other_tag]:
+            TaggedItem.objects.bulk_create([
+                TaggedItem(tag=tag, content_type=self.ctype,
+                           object_id=dummy.pk) for dummy in dummies])
+        TagCount.objects.rebuild()
+        TagCooccurrence.objects.rebuild()
+        # the items are loaded once and not updated one by one
+        with self.assertNumQueries(9):
+            Tag.objects.filter(pk=self.tag.pk).delete()
+        self.assertEqual(self.get_count(other_tag), 50, msg=(
+            'Deleting a tag should not change the counters of other tags.'))
+        self.assertFalse(TagCooccurrence.objects.exists(), msg=(
+            'Deleting a tag should delete its co-occurrences.'))
+        with self.assertNumQueries(8):
+            other_tag.delete()
+        self.assertFalse(TagCount.objects.exists(), msg=(
+            'Deleting a tag should delete its counters.'))
+
+
+class ReceiversTestCase(TestCase):
+    """Tests for connecting the signal handlers only if needed."""
+    longMessage = True
+
+    def test_receivers(self):
+        self.assertFalse(signals.receivers_needed(), msg=(
+            'Should not need the handlers without cache, counters,'
+            ' co-occurrences and request memo.'))
+        with patch.object(app_settings, 'CACHE_ENABLED', True):
+            self.assertTrue(signals.receivers_needed())
+        with self.settings(MIDDLEWARE=[
+                'multilingual_tags.middleware.TagMemoMiddleware']):
+            self.assertTrue(signals.receivers_needed())
+
+        collector = Collector(using='default')
+        self.assertTrue(
+            collector.can_fast_delete(TaggedItem.objects.all()), msg=(
+                'Should allow Django to delete tagged items without loading'
+                ' them, when the handlers are not connected.'))
+        signals.connect_receivers()
+        self.addCleanup(signals.disconnect_receivers)
+        self.assertFalse(collector.can_fast_delete(TaggedItem.objects.all()))
+
+        tag = mixer.blend('multilingual_tags.Tag')
+        signals.disconnect_receivers()
+        TaggedItem.objects.bulk_create([
+            TaggedItem(tag=tag, content_type=ContentType.objects.get_for_model(
+                DummyModel), object_id=dummy.pk)
+            for dummy in mixer.cycle(20).blend('test_app.DummyModel')])
+        # the items are deleted with one query instead of being loaded
+        with self.assertNumQueries(7):
+            tag.delete()
+        self.assertFalse(TaggedItem.objects.exists())
@@ -0,0 +1,51 @@
+"""Measures the queries and timings of the tagging hot paths."""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment
+
+from ....benchmarks import SCALES, SCENARIOS, audit_imports, measure
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs every benchmark scenario with generated data in a fresh test'
+        ' database and prints the number of queries and the best timing.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', type=int, nargs='+', default=SCALES,
+            help='The numbers of tags per object to run the scenarios with.')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='How often each scenario is timed.')
+        parser.add_argument(
+            '--imports', action='store_true',
+            help='Audits the imports of a fresh process instead.')
+
+    def handle(self, *args, **options):
+        if options['imports']:
+            return self.handle_imports()
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            self.stdout.write('{0:<32}{1:>8}{2:>10}{3:>12}'.format(
+                'scenario', 'tags', 'queries', 'ms'))
+            for name, scenario in SCENARIOS.items():
+                for scale in options['scales']:
+                    with transaction.atomic():
+                        run = scenario(scale)
+                        results = [measure(run)
+                                   for i in range(0, options['repeat'])]
+                        transaction.set_rollback(True)
+                    self.stdout.write('{0:<32}{1:>8}{2:>10}{3:>12.2f}'.format(
+                        name, scale, results[0][0],
+                        min(r[1] for r in results) * 1000))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def handle_imports(self):
+        self.stdout.write('{0:<40}{1:>10}{2:>12}'.format(
+            'import', 'modules', 'ms'))
+        for name, seconds, modules in audit_imports():
+            self.stdout.write('{0:<40}{1:>10}{2:>12.2f}'.format(
+                name, len(modules), seconds * 1000))
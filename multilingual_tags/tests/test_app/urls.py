@@ -1,5 +1,5 @@
 """URLs to run the tests."""
-from django.urls import path
+from django.urls import include, path
 from django.contrib import admin
 
 
@@ -7,4 +7,5 @@ admin.autodiscover()
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('tags/', include('multilingual_tags.urls')),
 ]
@@ -0,0 +1,109 @@
+"""Tests for the utilities of the ``multilingual_tags`` app."""
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache as default_cache
+from django.test import TestCase
+
+from mixer.backend.django import mixer
+
+from .. import app_settings, utils
+from ..models import Tag, TagCount, TaggedItem
+from .test_app.models import DummyModel
+
+
+class PrefetchTagsTestCase(TestCase):
+    """Tests for the ``prefetch_tags`` utility."""
+    longMessage = True
+
+    def setUp(self):
+        self.dummies = mixer.cycle(3).blend('test_app.DummyModel')
+        self.user = mixer.blend('auth.User')
+        self.tags = [mixer.blend('multilingual_tags.TagTranslation',
+                                 language_code='en').master
+                     for i in range(0, 2)]
+        self.untranslated_tag = mixer.blend('multilingual_tags.Tag')
+        dummy_ctype = ContentType.objects.get_for_model(DummyModel)
+        for tag in self.tags:
+            mixer.blend('multilingual_tags.TaggedItem', tag=tag,
+                        content_type=dummy_ctype,
+                        object_id=self.dummies[0].pk)
+        mixer.blend('multilingual_tags.TaggedItem', tag=self.tags[1],
+                    content_type=dummy_ctype, object_id=self.dummies[1].pk)
+        mixer.blend('multilingual_tags.TaggedItem', tag=self.untranslated_tag,
+                    content_type=ContentType.objects.get_for_model(User),
+                    object_id=self.user.pk)
+
+    def test_prefetch_tags(self):
+        objects = self.dummies + [self.user]
+        with self.assertNumQueries(2):
+            utils.prefetch_tags(objects)
+            names = [[str(tag) for tag in obj.prefetched_tags]
+                     for obj in objects]
+        self.assertEqual(names, [
+            [self.tags[0].name, self.tags[1].name],
+            [self.tags[1].name],
+            [],
+            [self.untranslated_tag.slug],
+        ], msg='Should attach the tags of each object.')
+
+
+@patch.object(app_settings, 'USE_COUNTERS', True)
+class TagObjectsTestCase(TestCase):
+    """Tests for the ``tag_objects`` and ``untag_objects`` utilities."""
+    longMessage = True
+
+    def setUp(self):
+        # parler caches the translations by the re-used primary keys
+        default_cache.clear()
+        self.dummies = mixer.cycle(5).blend('test_app.DummyModel')
+        self.user = mixer.blend('auth.User')
+        self.tag = mixer.blend('multilingual_tags.TagTranslation',
+                               language_code='en', name='Foo').master
+        mixer.blend(
+            'multilingual_tags.TaggedItem', tag=self.tag,
+            content_type=ContentType.objects.get_for_model(DummyModel),
+            object_id=self.dummies[0].pk)
+
+    def test_tag_objects(self):
+        result = utils.tag_objects(
+            DummyModel.objects.all(), [self.tag.slug, 'Bar', 'bar'],
+            batch_size=2)
+        self.assertEqual(result, {'tags': 2, 'objects': 5, 'items_added': 9})
+        self.assertEqual(TaggedItem.objects.count(), 10)
+        self.assertEqual(Tag.objects.language('en').get(slug='bar').name,
+                         'Bar', msg='Should create the missing tags.')
+        self.assertEqual(
+            sorted(TagCount.objects.values_list('count', flat=True)), [4, 5],
+            msg='Should update the counters.')
+
+        result = utils.tag_objects([self.dummies[0], self.user], ['Baz'])
+        self.assertEqual(result, {'tags': 1, 'objects': 2, 'items_added': 2},
+                         msg='Should tag instances of different models.')
+
+    def test_untag_objects(self):
+        utils.tag_objects(DummyModel.objects.all(), ['Bar', 'Baz'])
+        result = utils.untag_objects(
+            DummyModel.objects.filter(pk__in=[d.pk for d in self.dummies[:3]]),
+            ['bar', self.tag.slug], batch_size=2)
+        self.assertEqual(result, {'objects': 3, 'items_removed': 4})
+        self.assertEqual(
+            TagCount.objects.get(tag__slug='bar').count, 2,
+            msg='Should update the counters.')
+
+        street = Tag.objects.create(slug='street')
+        street.translations.create(language_code='en', name='Stra\u00dfe')
+        utils.tag_objects(self.dummies[:1], ['Stra\u00dfe'])
+        result = utils.untag_objects(self.dummies[:1], ['STRASSE'], 'en')
+        self.assertEqual(result['items_removed'], 1, msg=(
+            'Should match the names like tag_objects.'))
+        self.assertEqual(
+            utils.untag_objects(self.dummies, ['unknown'])['items_removed'],
+            0)
+
+        result = utils.untag_objects(self.dummies)
+        self.assertEqual(result, {'objects': 5, 'items_removed': 7})
+        self.assertFalse(TaggedItem.objects.exists())
+        self.assertEqual(
+            utils.untag_objects(self.dummies, [])['items_removed'], 0)
@@ -0,0 +1,59 @@
+"""Tests for the views of the ``multilingual_tags`` app."""
+from unittest.mock import patch
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from mixer.backend.django import mixer
+
+from .. import app_settings, views
+from ..models import TagCount
+from .test_app.models import DummyModel
+
+
+class TagAutocompleteViewTestCase(TestCase):
+    """Tests for the ``TagAutocompleteView`` view class."""
+    longMessage = True
+
+    def setUp(self):
+        for name in ['Foo', 'Foobar', 'Bar']:
+            mixer.blend('multilingual_tags.TagTranslation',
+                        language_code='en', name=name)
+        self.foobar = mixer.blend('multilingual_tags.TagTranslation',
+                                  language_code='de', name='foobaz')
+        mixer.blend(
+            'multilingual_tags.TaggedItem', tag=self.foobar.master,
+            content_type=ContentType.objects.get_for_model(DummyModel),
+            object_id=mixer.blend('test_app.DummyModel').pk)
+        self.foobar.master.translations.create(
+            language_code='en', name='Foobaz')
+
+    def test_view(self):
+        url = reverse('multilingual_tags_autocomplete')
+        with self.assertNumQueries(1):
+            resp = self.client.get(url, {'q': 'foo'})
+        self.assertEqual(resp.json(), {'tags': ['Foo', 'Foobar', 'Foobaz']},
+                         msg='Should return the tags starting with the query.')
+        resp = self.client.get(url, {'q': 'foo', 'limit': 'x'})
+        self.assertEqual(len(resp.json()['tags']), 3)
+        resp = self.client.get(url, {'q': 'foo', 'limit': 1})
+        self.assertEqual(resp.json(), {'tags': ['Foo']})
+        resp = self.client.get(url, {'q': ' '})
+        self.assertEqual(resp.json(), {'tags': []})
+        resp = self.client.get(url, {'q': '\uff26OO'})
+        self.assertEqual(resp.json(), {'tags': ['Foo', 'Foobar', 'Foobaz']},
+                         msg='Should match the normalised names.')
+
+        view = views.TagAutocompleteView.as_view(rank_by_usage=True)
+        resp = view(RequestFactory().get(url, {'q': 'foo'}))
+        self.assertEqual(
+            resp.content, b'{"tags": ["Foobaz", "Foo", "Foobar"]}',
+            msg='Should return the most used tags first.')
+
+        TagCount.objects.rebuild()
+        with patch.object(app_settings, 'USE_COUNTERS', True):
+            resp = view(RequestFactory().get(url, {'q': 'foo'}))
+        self.assertEqual(
+            resp.content, b'{"tags": ["Foobaz", "Foo", "Foobar"]}',
+            msg='Should rank the tags by their counters.')
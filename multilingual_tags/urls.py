@@ -0,0 +1,10 @@
+"""URLs for the ``multilingual_tags`` app."""
+from django.urls import path
+
+from . import views
+
+
+urlpatterns = [
+    path('autocomplete/', views.TagAutocompleteView.as_view(),
+         name='multilingual_tags_autocomplete'),
+]
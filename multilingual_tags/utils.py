@@ -0,0 +1,224 @@
+"""Utilities for the ``multilingual_tags`` app."""
+from collections import Counter, defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, OuterRef, QuerySet, Subquery
+from django.utils.translation import get_language
+
+from parler.cache import MISSING
+
+from . import app_settings, cache, metrics, models, signals
+from .async_utils import run_in_thread
+
+
+def cache_translation(tag, language, translation_id, name):
+    """
+    Puts an already fetched translation of a tag into parler's cache.
+
+    This way, reading the name of the tag in that language does not need
+    another query.
+
+    """
+    tag.set_current_language(language)
+    if translation_id is None:
+        # tells parler, that the translation does not exist
+        translation = MISSING
+    else:
+        translation = models.TagTranslation(
+            pk=translation_id, master=tag, language_code=language, name=name)
+        translation._state.adding = False
+        translation._state.db = tag._state.db
+    tag._translations_cache[models.TagTranslation][language] = translation
+
+
+def prefetch_tags(objects, attname='prefetched_tags', language=None):
+    """
+    Attaches the tags of each object as a list to ``attname``.
+
+    The objects can be instances of different models. The tagged items, tags
+    and their translation in the given or active language are fetched with one
+    query per content type. Each tag gets its name with fallbacks as
+    ``display_name``.
+
+    """
+    language = language or get_language()
+    objects_by_ctype = defaultdict(list)
+    for obj in objects:
+        setattr(obj, attname, [])
+        objects_by_ctype[ContentType.objects.get_for_model(obj)].append(obj)
+
+    translations = models.TagTranslation.objects.filter(
+        master=OuterRef('tag'), language_code=language)
+    for ctype, ctype_objects in objects_by_ctype.items():
+        tags_by_object_id = defaultdict(list)
+        tags = {}
+        items = models.TaggedItem.objects.filter(
+            content_type=ctype,
+            object_id__in=set(obj.pk for obj in ctype_objects),
+        ).select_related('tag').annotate(
+            translation_id=Subquery(translations.values('pk')[:1]),
+            translation_name=Subquery(translations.values('name')[:1]),
+            display_name=models.get_display_name('tag', language),
+        ).order_by('pk')
+        for item in items:
+            tag = tags.get(item.tag_id)
+            if tag is None:
+                tag = tags[item.tag_id] = item.tag
+                cache_translation(tag, language, item.translation_id,
+                                  item.translation_name)
+                tag.display_name = item.display_name
+            tags_by_object_id[item.object_id].append(tag)
+        for obj in ctype_objects:
+            setattr(obj, attname, tags_by_object_id[obj.pk])
+
+
+def _get_object_id_batches(objects, batch_size):
+    """
+    Yields ``(content_type, object_ids)`` tuples with up to ``batch_size`` ids.
+
+    Querysets are read as a stream of primary keys, so that their objects are
+    never loaded into memory.
+
+    """
+    if isinstance(objects, QuerySet):
+        ctype = ContentType.objects.get_for_model(objects.model)
+        batch = []
+        for pk in objects.order_by().values_list('pk', flat=True).iterator(
+                chunk_size=batch_size):
+            batch.append(pk)
+            if len(batch) >= batch_size:
+                yield ctype, batch
+                batch = []
+        if batch:
+            yield ctype, batch
+        return
+
+    batches = defaultdict(list)
+    for obj in objects:
+        ctype = ContentType.objects.get_for_model(obj)
+        batches[ctype].append(obj.pk)
+        if len(batches[ctype]) >= batch_size:
+            yield ctype, batches.pop(ctype)
+    for ctype, batch in batches.items():
+        yield ctype, batch
+
+
+def tag_objects(objects, tag_names, language=None, user=None,
+                batch_size=1000):
+    """
+    Adds the tags to all given objects.
+
+    :objects: A queryset or an iterable of model instances.
+    :tag_names: The names of the tags. Missing tags are created with their
+      name in the given or active language.
+    :user: Stored on the new tagged items.
+
+    Existing tagged items are left untouched. The items are inserted in
+    batches, each within its own transaction. Returns a dictionary with the
+    number of ``tags``, ``objects`` and ``items_added``.
+
+    """
+    instrumented = metrics.instrument(
+        'utils.tag_objects', objects=0, items_added=0)
+    with instrumented as result:
+        tag_names = list(tag_names)
+        tag_ids = []
+        for i in range(0, len(tag_names), batch_size):
+            tags = models.Tag.objects.get_or_create_many(
+                tag_names[i:i + batch_size], language)
+            tag_ids.extend(tag.pk for tag in tags)
+        tag_ids = list(dict.fromkeys(tag_ids))
+        result['tags'] = len(tag_ids)
+        if not tag_ids:
+            return result
+
+        for ctype, object_ids in _get_object_id_batches(objects, batch_size):
+            result['objects'] += len(object_ids)
+            with transaction.atomic():
+                existing = set(models.TaggedItem.objects.filter(
+                    content_type=ctype,
+                    object_id__in=object_ids,
+                    tag_id__in=tag_ids,
+                ).values_list('object_id', 'tag_id'))
+                items = [
+                    models.TaggedItem(tag_id=tag_id, content_type=ctype,
+                                      object_id=object_id, user=user)
+                    for object_id in object_ids for tag_id in tag_ids
+                    if (object_id, tag_id) not in existing]
+                models.TaggedItem.objects.bulk_create(
+                    items, ignore_conflicts=True)
+                if app_settings.USE_COUNTERS:
+                    _update_counts(
+                        ctype, Counter(item.tag_id for item in items))
+            cache.invalidate_objs(ctype.pk, object_ids)
+            result['items_added'] += len(items)
+        if app_settings.USE_COOCCURRENCES and result['items_added']:
+            models.TagCooccurrence.objects.rebuild(tag_ids=tag_ids)
+    return result
+
+
+def untag_objects(objects, tag_names=None, language=None, batch_size=1000):
+    """
+    Removes the tags from all given objects.
+
+    :objects: A queryset or an iterable of model instances.
+    :tag_names: The names or slugs of the tags to remove. If ``None``, all
+      tags are removed. The names are matched in the given or active
+      language like by ``tag_objects``.
+
+    Returns a dictionary with the number of ``objects`` and ``items_removed``.
+
+    """
+    instrumented = metrics.instrument(
+        'utils.untag_objects', objects=0, items_removed=0)
+    with instrumented as result:
+        tag_ids = None
+        if tag_names is not None:
+            tag_ids = [tag.pk for tag in models.Tag.objects.get_many(
+                tag_names, language)]
+            if not tag_ids:
+                return result
+
+        removed_tag_ids = set()
+        read_counts = (
+            app_settings.USE_COUNTERS or app_settings.USE_COOCCURRENCES)
+        for ctype, object_ids in _get_object_id_batches(objects, batch_size):
+            result['objects'] += len(object_ids)
+            items = models.TaggedItem.objects.filter(
+                content_type=ctype, object_id__in=object_ids)
+            if tag_ids is not None:
+                items = items.filter(tag_id__in=tag_ids)
+            with transaction.atomic():
+                if read_counts:
+                    counts = Counter(dict(items.order_by().values_list(
+                        'tag_id').annotate(Count('pk'))))
+                    removed_tag_ids.update(counts)
+                with signals.counters_muted():
+                    removed, _ = items.delete()
+                if app_settings.USE_COUNTERS:
+                    _update_counts(ctype, counts, -1)
+            cache.invalidate_objs(ctype.pk, object_ids)
+            result['items_removed'] += removed
+        if app_settings.USE_COOCCURRENCES and removed_tag_ids:
+            models.TagCooccurrence.objects.rebuild(tag_ids=removed_tag_ids)
+    return result
+
+
+async def atag_objects(objects, tag_names, **kwargs):
+    """Async version of ``tag_objects``."""
+    return await run_in_thread(tag_objects, objects, tag_names, **kwargs)
+
+
+async def auntag_objects(objects, tag_names=None, **kwargs):
+    """Async version of ``untag_objects``."""
+    return await run_in_thread(untag_objects, objects, tag_names, **kwargs)
+
+
+def _update_counts(ctype, counts, sign=1):
+    """Applies a ``{tag_id: count}`` mapping to the tag counters."""
+    tag_ids_by_count = defaultdict(list)
+    for tag_id, count in counts.items():
+        tag_ids_by_count[count].append(tag_id)
+    for count, tag_ids in tag_ids_by_count.items():
+        models.TagCount.objects.update_counts(ctype.pk, tag_ids, sign * count)
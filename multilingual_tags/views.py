@@ -0,0 +1,58 @@
+"""Views for the ``multilingual_tags`` app."""
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.utils.translation import get_language
+from django.views.generic import View
+
+from . import app_settings, models
+
+
+class TagAutocompleteView(View):
+    """
+    Returns the names of the tags starting with the ``q`` parameter as JSON.
+
+    Only the translations in the active language are searched. Their
+    normalised names are matched by prefix, so that the query is answered
+    from the ``multilingual_tagtrans_norm`` index. Set ``rank_by_usage`` to
+    return the most used tags first.
+
+    """
+    limit = 10
+    max_limit = 50
+    rank_by_usage = False
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get('limit', self.limit))
+        except ValueError:
+            limit = self.limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_queryset(self, query):
+        prefix = models.normalize_name(query)
+        qs = models.TagTranslation.objects.filter(
+            language_code=get_language(),
+            normalized_name__startswith=prefix,
+        )
+        if connection.vendor == 'sqlite':
+            # SQLite only uses an index for LIKE with case insensitive
+            # collations, but it can for the range of the prefix
+            qs = qs.filter(normalized_name__gte=prefix,
+                           normalized_name__lt=prefix + '\U0010ffff')
+        if not self.rank_by_usage:
+            return qs.order_by('normalized_name', 'name')
+        if app_settings.USE_COUNTERS:
+            usage = Coalesce(Sum('master__counts__count'), 0)
+        else:
+            usage = Count('master__tagged_items')
+        return qs.annotate(usage_count=usage).order_by('-usage_count', 'name')
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '').strip()
+        tags = []
+        if query:
+            tags = list(self.get_queryset(query).values_list(
+                'name', flat=True)[:self.get_limit()])
+        return JsonResponse({'tags': tags})